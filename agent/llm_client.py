@@ -5,6 +5,14 @@ import re  # Add this import for regex functionality
 from typing import Dict, Any, Optional, Union, List
 import streamlit as st
 
+# One session for all OpenAI calls, so repeated completions reuse the pooled
+# keep-alive connection instead of a fresh TCP/TLS handshake per request.
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# Fenced JSON block in a Gemini response, compiled once at import
+_JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*([\s\S]*?)\s*```")
+
 class LLMClient:
     def __init__(self, api_key: Optional[str] = None, provider: str = "openai"):
         """Initialize the LLM client with an API key.
@@ -64,7 +72,7 @@ class LLMClient:
         }
         
         try:
-            response = requests.post(
+            response = _HTTP_SESSION.post(
                 self.api_url,
                 headers=headers,
                 json=data
@@ -112,7 +120,7 @@ class LLMClient:
             if hasattr(response, 'text'):
                 result = response.text
                 # Check if the response contains a code block with JSON
-                json_block_match = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", result)
+                json_block_match = _JSON_BLOCK_RE.search(result)
                 if json_block_match:
                     try:
                         # If we can parse it as JSON, return just the JSON part
@@ -3,9 +3,12 @@
 import time
 import re
 import json
+import logging
 from typing import Dict, Any, Tuple, Optional, Union, Callable
 from .constants import MAX_RETRIES, RETRY_DELAY
 
+logger = logging.getLogger(__name__)
+
 def handle_retryable_error(func: Callable, *args, **kwargs):
     """
     Retry a function on failure.
@@ -29,7 +32,7 @@ def handle_retryable_error(func: Callable, *args, **kwargs):
             retries += 1
             if retries >= MAX_RETRIES:
                 raise
-            print(f"Error: {e}. Retrying in {RETRY_DELAY}s...")
+            logger.warning("Error: %s. Retrying in %ss...", e, RETRY_DELAY)
             time.sleep(RETRY_DELAY)
     raise RuntimeError("Unexpected error in handle_retryable_error")
 
@@ -68,6 +71,12 @@ def parse_constraint(constraint_str: str) -> Tuple[str, str]:
         return parts[0].strip(), parts[1].strip()
     return "generic", constraint_str.strip()
 
+# Patterns used by extract_json_from_text, compiled once at import
+_CODE_BLOCK_RE = re.compile(r"```(?:json)?\s*([\s\S]*?)\s*```")
+_NESTED_OBJECT_RE = re.compile(r"\{(?:[^{}]|(?:\{(?:[^{}]|(?:\{(?:[^{}])*\}))*\}))*\}")
+_RESULT_OBJECT_RE = re.compile(r"\{\s*\"result\"[\s\S]*?\}")
+_SUBTASKS_OBJECT_RE = re.compile(r"\{\s*\"subtasks\"[\s\S]*?\}")
+
 def extract_json_from_text(text: str) -> Optional[Dict[str, Any]]:
     """
     Extract JSON object from text.
@@ -79,8 +88,7 @@ def extract_json_from_text(text: str) -> Optional[Dict[str, Any]]:
         Extracted JSON object as dict or None if no valid JSON found
     """
     # Try to find JSON in code blocks
-    code_block_pattern = r"```(?:json)?\s*([\s\S]*?)\s*```"
-    matches = re.findall(code_block_pattern, text)
+    matches = _CODE_BLOCK_RE.findall(text)
     for potential_json in matches:
         try:
             return json.loads(potential_json)
@@ -88,8 +96,7 @@ def extract_json_from_text(text: str) -> Optional[Dict[str, Any]]:
             continue
     
     # Try to find JSON with regex
-    json_pattern = r"\{(?:[^{}]|(?:\{(?:[^{}]|(?:\{(?:[^{}])*\}))*\}))*\}"
-    match = re.search(json_pattern, text)
+    match = _NESTED_OBJECT_RE.search(text)
     if match:
         json_str = match.group(0)
         try:
@@ -98,16 +105,14 @@ def extract_json_from_text(text: str) -> Optional[Dict[str, Any]]:
             pass
     
     # Look for specific patterns
-    result_pattern = r"\{\s*\"result\"[\s\S]*?\}"
-    match = re.search(result_pattern, text)
+    match = _RESULT_OBJECT_RE.search(text)
     if match:
         try:
             return json.loads(match.group(0))
         except json.JSONDecodeError:
             pass
     
-    subtasks_pattern = r"\{\s*\"subtasks\"[\s\S]*?\}"
-    match = re.search(subtasks_pattern, text)
+    match = _SUBTASKS_OBJECT_RE.search(text)
     if match:
         try:
             return json.loads(match.group(0))
@@ -10,10 +10,10 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from components.agent import Agent
 from components.node import Node
 from components.file_explorer import FileExplorer
-from components.terminal import Terminal, ClineInterface
+from components.terminal import ClineInterface
 from components.editor import Editor
 from components.graph_view import GraphView
-from components.utils import initialize_gemini_api, get_model, STATUS_PENDING, STATUS_COMPLETED, STATUS_RUNNING, STATUS_FAILED
+from components.utils import initialize_gemini_api, get_model, STATUS_PENDING, STATUS_COMPLETED, STATUS_FAILED, STATUS_EMOJI
 
 # Try to import any useful classes/functions from agent folder if they exist
 try:
@@ -24,6 +24,17 @@ try:
 except ImportError:
     pass  # If these don't exist, we'll use our component versions
 
+# Models offered in the settings sidebar; fixed, so built once per process
+# rather than on every rerun
+MODEL_OPTIONS = (
+    "gemini-2.0-flash",
+    "gemini-2.0-flash-lite",
+    "gemini-2.0-pro-exp-02-05",
+    "gemini-2.0-flash-thinking-exp-01-21",
+    "gemini-2.0-flash-exp",
+)
+DEFAULT_MODEL_INDEX = MODEL_OPTIONS.index("gemini-2.0-pro-exp-02-05")
+
 def main():
     st.set_page_config(page_title="Smart Agent IDE", layout="wide", page_icon="🤖")
     
@@ -290,24 +301,23 @@ def main():
                     # Hierarchical tree display
                     st.subheader("Task Hierarchy")
                     
+                    # Bound once; st.session_state attribute access is not free
+                    # and this runs for every node in the tree.
+                    node_lookup = st.session_state.node_lookup
+                    
                     # Function to recursively render the tree
                     def render_node_tree(node_id, indent=0):
-                        if node_id not in st.session_state.node_lookup:
+                        node = node_lookup.get(node_id)
+                        if node is None:
                             return
                             
-                        node = st.session_state.node_lookup[node_id]
                         task = node.retrieve_from_memory("task") or f"Node {node_id[:8]}"
                         
                         # Determine CSS class based on status
                         status_class = f"node-{node.status}"
                         
                         # Status emoji
-                        status_emoji = {
-                            STATUS_PENDING: "🔘",
-                            STATUS_RUNNING: "⏳",
-                            STATUS_COMPLETED: "✅",
-                            STATUS_FAILED: "❌"
-                        }.get(node.status, "⚪")
+                        status_emoji = STATUS_EMOJI.get(node.status, "⚪")
                         
                         # Node container with appropriate styling
                         st.markdown(f'<div class="node-card {status_class}" style="margin-left: {indent*20}px">', unsafe_allow_html=True)
@@ -579,12 +589,9 @@ def main():
                 st.session_state.show_terminal = False
                 st.rerun()
         
-        # Initialize terminal if not already done
-        if 'terminal' not in st.session_state:
-            st.session_state.terminal = Terminal()
-        
-        # Display terminal interface
-        cli = ClineInterface(st.session_state.terminal)
+        # Display terminal interface; the shared Terminal keeps its history
+        # and working directory in session_state
+        cli = ClineInterface()
         cli.display()
         st.markdown('</div>', unsafe_allow_html=True)
     else:
@@ -605,24 +612,17 @@ def main():
     with st.sidebar.expander("⚙️ Settings"):
         # Model selection
         st.subheader("Model Settings")
-        models = [
-            "gemini-2.0-flash",
-            "gemini-2.0-flash-lite",
-            "gemini-2.0-pro-exp-02-05", 
-            "gemini-2.0-flash-thinking-exp-01-21",
-            "gemini-2.0-flash-exp"
-        ]
-        selected_model = st.selectbox("Select Model", models, 
-                                       index=models.index("gemini-2.0-pro-exp-02-05") if "gemini-2.0-pro-exp-02-05" in models else 0)
+        selected_model = st.selectbox("Select Model", MODEL_OPTIONS, index=DEFAULT_MODEL_INDEX)
         if selected_model != st.session_state.get('selected_model'):
             st.session_state.selected_model = selected_model
 
         # LLM configuration
         st.subheader("LLM Configuration")
-        temperature = st.slider("Temperature", 0.0, 1.0, st.session_state.get("llm_config", {}).get("temperature", 0.7), 0.1)
-        top_p = st.slider("Top P", 0.0, 1.0, st.session_state.get("llm_config", {}).get("top_p", 0.95), 0.05)
-        top_k = st.slider("Top K", 1, 100, st.session_state.get("llm_config", {}).get("top_k", 40), 1)
-        max_tokens = st.slider("Max Output Tokens", 100, 8192, st.session_state.get("llm_config", {}).get("max_output_tokens", 2048), 100)
+        llm_config = st.session_state.get("llm_config", {})
+        temperature = st.slider("Temperature", 0.0, 1.0, llm_config.get("temperature", 0.7), 0.1)
+        top_p = st.slider("Top P", 0.0, 1.0, llm_config.get("top_p", 0.95), 0.05)
+        top_k = st.slider("Top K", 1, 100, llm_config.get("top_k", 40), 1)
+        max_tokens = st.slider("Max Output Tokens", 100, 8192, llm_config.get("max_output_tokens", 2048), 100)
         
         if st.button("Apply Settings"):
             st.session_state.llm_config = {
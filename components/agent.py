@@ -2,14 +2,33 @@ import streamlit as st
 import os
 import json
 import time
+import hashlib
+import logging
+from sys import intern
 from typing import Optional, Dict, List, Any
 
 from components.memory import GlobalMemory, LocalMemory
 from components.attention_mechanism import AttentionMechanism
 from components.node import Node
-from components.utils import handle_node_retryable_error, MAX_DEPTH, MAX_RETRIES, RETRY_DELAY, GLOBAL_CONTEXT_SUMMARY_INTERVAL, STATUS_PENDING, STATUS_RUNNING, STATUS_COMPLETED, STATUS_FAILED
+from components.utils import handle_node_retryable_error, MAX_DEPTH, MAX_RETRIES, RETRY_DELAY, GLOBAL_CONTEXT_SUMMARY_INTERVAL, RESPONSE_CACHE_SIZE, STATUS_PENDING, STATUS_RUNNING, STATUS_COMPLETED, STATUS_FAILED
 from components.file_manager import FileManager
 
+logger = logging.getLogger(__name__)
+
+# Trailing characters of a streaming response shown while it is generated
+STREAM_PREVIEW_CHARS = 2000
+
+def _prompt_cache_key(prompt: str, model_name: str = "", llm_config: Optional[Dict[str, Any]] = None) -> str:
+    """Hash a prompt, ignoring differences in whitespace, for the response cache.
+    
+    The model name and generation settings are part of the key, so changing
+    either in the sidebar never serves a response produced under the old ones.
+    """
+    normalized = " ".join(prompt.split())
+    settings = repr(sorted((llm_config or {}).items()))
+    key_text = f"{model_name}\x00{settings}\x00{normalized}"
+    return hashlib.blake2b(key_text.encode("utf-8"), digest_size=16).hexdigest()
+
 class Agent:
     def __init__(self, llm, llm_config, global_context: str = "This agent decomposes complex tasks.") -> None:
         self.attention_mechanism = AttentionMechanism()
@@ -21,6 +40,8 @@ class Agent:
         self.max_depth = MAX_DEPTH
         self.global_context_summary_interval = GLOBAL_CONTEXT_SUMMARY_INTERVAL
         self.file_manager = FileManager()
+        # Prompt hash -> LLM output, so identical prompts skip the LLM call
+        self.response_cache: Dict[str, str] = {}
 
     def run(self, task_description: str, initial_constraints: Optional[list[str]] = None) -> None:
         self.reset_agent()
@@ -67,11 +88,21 @@ class Agent:
         return new_node
 
     def delete_node_and_children(self, node: Node) -> None:
-        for child_id in node.child_ids:
-            if child_id in st.session_state.node_lookup:
-                self.delete_node_and_children(st.session_state.node_lookup[child_id])
-        st.session_state.node_lookup.pop(node.node_id, None)
-        st.session_state.attention_mechanism.remove_node(node.node_id)
+        # Collect the whole subtree in one walk, then clear the attention
+        # mechanism for all of it at once rather than rescanning its
+        # dependency graph for every deleted node
+        node_lookup = st.session_state.node_lookup
+        deleted = set()
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            deleted.add(current.node_id)
+            node_lookup.pop(current.node_id, None)
+            for child_id in current.child_ids:
+                child = node_lookup.get(child_id)
+                if child is not None:
+                    stack.append(child)
+        st.session_state.attention_mechanism.remove_nodes(deleted)
 
     def agentFlow(self, action: str, node: Node, regeneration_guidance: str = "") -> None:
         if action == "execute":
@@ -85,7 +116,32 @@ class Agent:
         else:
             raise ValueError(f"Invalid action: {action}")
 
-    def _execute_node(self, node: Node) -> None:
+    def _stream_response(self, prompt: str) -> str:
+        """Generate a response, showing the text in place as it streams in."""
+        response = self.llm.generate_content(
+            prompt,
+            generation_config=self.llm_config,
+            stream=True
+        )
+        placeholder = st.empty()
+        preview = ""
+        for chunk in response:
+            try:
+                preview = (preview + chunk.text)[-STREAM_PREVIEW_CHARS:]
+            except ValueError:  # chunk without text parts, e.g. only a finish reason
+                continue
+            placeholder.code(preview, language="text")
+        placeholder.empty()
+        # After iteration the response holds the full, aggregated text
+        return response.text
+
+    def _cache_response(self, cache_key: str, llm_output: str) -> None:
+        """Remember an LLM output, evicting the oldest entry when full."""
+        if len(self.response_cache) >= RESPONSE_CACHE_SIZE:
+            self.response_cache.pop(next(iter(self.response_cache)))
+        self.response_cache[cache_key] = llm_output
+
+    def _execute_node(self, node: Node, use_cache: bool = True) -> None:
         # Show loading spinner
         with st.spinner(f"Executing node: {node.retrieve_from_memory('task')}"):
             node.status = STATUS_RUNNING
@@ -103,16 +159,19 @@ class Agent:
                 if st.button("Show/Hide Prompt", key=f"show_prompt_{node.node_id}"):
                     st.code(prompt, language="text")
 
+            cache_key = _prompt_cache_key(prompt, getattr(self.llm, "model_name", ""), self.llm_config)
             success = False
             with output_container:
                 for attempt in range(MAX_RETRIES):
                     try:
-                        with st.spinner("Generating response..."):
-                            response = self.llm.generate_content(
-                                prompt,
-                                generation_config=self.llm_config
-                            )
-                            llm_output = response.text
+                        # Only the first attempt may reuse a cached response;
+                        # retries always go back to the LLM
+                        llm_output = self.response_cache.get(cache_key) if use_cache and attempt == 0 else None
+                        if llm_output is None:
+                            with st.spinner("Generating response..."):
+                                llm_output = self._stream_response(prompt)
+                        else:
+                            st.info("Reusing the cached response for an identical prompt")
                         
                         if not llm_output or llm_output.strip() == "":
                             raise ValueError("Empty response from LLM")
@@ -143,8 +202,11 @@ class Agent:
                         # Check constraints - if failed, continue trying
                         if not st.session_state.attention_mechanism.check_constraints(node):
                             success = False
+                            self.response_cache.pop(cache_key, None)
                             continue
                         
+                        if success:
+                            self._cache_response(cache_key, llm_output)
                         break
                     except Exception as e:
                         st.error(f"Error in attempt {attempt+1}: {str(e)}")
@@ -171,9 +233,10 @@ class Agent:
                     # If root node, show the task decomposition
                     if node.node_id == st.session_state.root_node_id and node.child_ids:
                         st.write("**Task decomposed into the following subtasks:**")
+                        node_lookup = st.session_state.node_lookup
                         for i, child_id in enumerate(node.child_ids):
-                            if child_id in st.session_state.node_lookup:
-                                child_node = st.session_state.node_lookup[child_id]
+                            child_node = node_lookup.get(child_id)
+                            if child_node is not None:
                                 task = child_node.retrieve_from_memory("task")
                                 st.write(f"{i+1}. {task}")
 
@@ -241,21 +304,11 @@ class Agent:
     def _extract_code_from_json_output(self, node: Node) -> None:
         """Extract code from JSON output and create files for it."""
         try:
-            # Try to parse the output as JSON
-            import json
-            try:
-                output_json = json.loads(node.output)
-            except json.JSONDecodeError:
-                # Try to extract JSON part from the text
-                import re
-                json_match = re.search(r'```json\s*([\s\S]*?)\s*```', node.output)
-                if json_match:
-                    try:
-                        output_json = json.loads(json_match.group(1))
-                    except:
-                        return
-                else:
-                    return
+            # Reuse the JSON that process_llm_output already parsed from the
+            # output instead of parsing it a second time
+            output_json = node.parsed_output()
+            if not isinstance(output_json, dict):
+                return
                 
             # Look for code in JSON fields
             code_files = {}
@@ -289,7 +342,7 @@ class Agent:
                 
         except Exception as e:
             # Just log the error but don't crash
-            print(f"Error extracting code from JSON: {str(e)}")
+            logger.error("Error extracting code from JSON: %s", e)
 
     def _regenerate_node(self, node: Node, regeneration_guidance: str) -> None:
         node.status = STATUS_PENDING
@@ -297,12 +350,14 @@ class Agent:
         node.error_message = ""
         node.store_in_memory("regeneration_guidance", regeneration_guidance)
         # Remove all child nodes
+        node_lookup = st.session_state.node_lookup
         for child_id in node.child_ids[:]:
-            if child_id in st.session_state.node_lookup:
-                self.delete_node_and_children(st.session_state.node_lookup[child_id])
+            child = node_lookup.get(child_id)
+            if child is not None:
+                self.delete_node_and_children(child)
         node.child_ids = []
-        # Re-execute the node
-        self._execute_node(node)
+        # Re-execute the node, asking the LLM for a fresh response
+        self._execute_node(node, use_cache=False)
 
     def _select_node(self, node: Node) -> None:
         """Handle node selection for continuation or detailed execution"""
@@ -327,7 +382,7 @@ class Agent:
     
     def save_session(self, filename: str) -> None:
         data = {
-            "node_lookup": {node_id: {k: v for k, v in node.__dict__.items() if k != 'local_memory'} for node_id, node in st.session_state.node_lookup.items()},
+            "node_lookup": {node_id: node.to_dict() for node_id, node in st.session_state.node_lookup.items()},
             "attention_mechanism": {
                 "dependency_graph": st.session_state.attention_mechanism.dependency_graph,
                 "constraints": st.session_state.attention_mechanism.constraints,
@@ -338,7 +393,7 @@ class Agent:
         }
 
         for node_id, node_data in data["node_lookup"].items():
-            node_data["local_memory"] = node_data["local_memory"].local_memory
+            node_data["local_memory"] = st.session_state.node_lookup[node_id].local_memory.local_memory
 
         with open(filename, "w") as f:
             json.dump(data, f, indent=4)
@@ -349,7 +404,11 @@ class Agent:
 
         self.reset_agent()
 
-        st.session_state.root_node_id = data["root_node_id"]
+        # Ids and statuses are interned as they come out of the JSON, so the
+        # lookup keys, parent/child references and status constants are the
+        # same objects and compare by identity instead of character by character
+        root_node_id = data["root_node_id"]
+        st.session_state.root_node_id = intern(root_node_id) if root_node_id is not None else None
         st.session_state.node_lookup = {}
         
         # Fix the node loading process
@@ -360,14 +419,15 @@ class Agent:
                 if "task" in node_data["local_memory"]:
                     task_description = node_data["local_memory"]["task"]
                     
+            parent_id = node_data["parent_id"]
             new_node = Node(
-                parent_id=node_data["parent_id"], 
+                parent_id=intern(parent_id) if parent_id is not None else None, 
                 task_description=task_description, 
                 depth=node_data.get("depth", 0)
             )
-            new_node.node_id = node_data["node_id"]
-            new_node.child_ids = node_data["child_ids"]
-            new_node.status = node_data["status"]
+            new_node.node_id = intern(node_data["node_id"])
+            new_node.child_ids = [intern(child_id) for child_id in node_data["child_ids"]]
+            new_node.status = intern(node_data["status"])
             new_node.output = node_data["output"]
             new_node.error_message = node_data.get("error_message", "")
             
@@ -377,7 +437,7 @@ class Agent:
                 for key, value in node_data["local_memory"].items():
                     new_node.local_memory.store(key, value)
                     
-            st.session_state.node_lookup[node_id] = new_node
+            st.session_state.node_lookup[intern(node_id)] = new_node
 
         # Set up attention mechanism and constraints
         st.session_state.attention_mechanism.dependency_graph = data["attention_mechanism"]["dependency_graph"]
@@ -2,12 +2,49 @@ import streamlit as st
 import json
 import time
 import re
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Set
 
-from components.utils import parse_constraint, STATUS_FAILED
+from components.utils import parse_constraint, extract_json_from_text, STATUS_FAILED
 
 from components.node import Node
 
+# Markdown code block: ```language ... ```
+_CODE_BLOCK_RE = re.compile(r'```(\w*)\n(.*?)\n```', re.DOTALL)
+
+
+# Models that rejected JSON output mode; they are asked for plain text instead
+_NO_JSON_MODE_MODELS: Set[str] = set()
+
+
+def _generate_json(llm: Any, prompt: str) -> Any:
+    """Ask llm for a JSON object and return it parsed.
+    
+    JSON output mode is requested so the reply is a bare document rather
+    than prose or a fenced block. Not every model supports it: if the
+    request is rejected as invalid and the same request without it goes
+    through, the model is remembered and from then on asked for plain text,
+    from which the object is extracted.
+    
+    response.text raises ValueError when the response was blocked or empty;
+    like a JSON parse error, that propagates to the caller.
+    """
+    from google.api_core.exceptions import InvalidArgument
+    model_name = getattr(llm, "model_name", "")
+    config = st.session_state.llm_config
+    if model_name not in _NO_JSON_MODE_MODELS:
+        try:
+            response = llm.generate_content(
+                prompt,
+                generation_config={**config, "response_mime_type": "application/json"}
+            )
+            return json.loads(response.text)
+        except InvalidArgument:
+            response = llm.generate_content(prompt, generation_config=config)
+            _NO_JSON_MODE_MODELS.add(model_name)
+            return extract_json_from_text(response.text)
+    response = llm.generate_content(prompt, generation_config=config)
+    return extract_json_from_text(response.text)
+
 
 class AttentionMechanism:
     def __init__(self) -> None:
@@ -51,33 +88,31 @@ class AttentionMechanism:
 
     def propagate_constraints(self, parent_node_id: str) -> None:
         parent_constraints = self.get_constraints(parent_node_id)
-        if parent_node_id in st.session_state.node_lookup:
-            for child_id in st.session_state.node_lookup[parent_node_id].child_ids:
-                for constraint in parent_constraints:
-                    if constraint not in self.get_constraints(child_id):
-                        self.add_constraint(child_id, constraint)
+        parent = st.session_state.node_lookup.get(parent_node_id)
+        if parent is None or not parent_constraints:
+            return
+        for child_id in parent.child_ids:
+            child_constraints = self.constraints.setdefault(child_id, [])
+            # Set view of the child's list, so each check is O(1) rather than a scan
+            present = set(child_constraints)
+            for constraint in parent_constraints:
+                if constraint not in present:
+                    child_constraints.append(constraint)
+                    present.add(constraint)
 
     def _summarize_global_context(self) -> None:
-        prompt = f"""Summarize the following global context into a concise JSON object with a single field "summary":\n\n{st.session_state.agent.global_memory.get_context()}"""
+        agent = st.session_state.agent
+        prompt = f"""Summarize the following global context into a concise JSON object with a single field "summary":\n\n{agent.global_memory.get_context()}"""
         try:
-            response = st.session_state.agent.llm.generate_content(
-                prompt,
-                generation_config=st.session_state.llm_config
-            )
-            response_content = response.text
-            if response_content is not None and isinstance(response_content, str):
-                summary_json = json.loads(response_content)
-                st.session_state.agent.global_memory.update_context(summary_json.get("summary", "Error: Could not summarize global context."))
-            else:
-                new_context = "Error: LLM returned None or non-string response for global context summarization."
-                st.session_state.agent.global_memory.update_context(new_context)
-                st.error(new_context)
+            summary_json = _generate_json(agent.llm, prompt)
+            agent.global_memory.update_context(summary_json.get("summary", "Error: Could not summarize global context."))
         except (json.JSONDecodeError, KeyError, Exception) as e:
             new_context = f"Error during summarization: {e}"
-            st.session_state.agent.global_memory.update_context(new_context)
+            agent.global_memory.update_context(new_context)
             st.error(new_context)
 
     def summarize_node(self, node: "Node") -> None:
+        agent = st.session_state.agent
         prompt = f"""Summarize the following task and its result concisely into a JSON object with two fields "task_summary" and "result_summary":
 
 Task: {node.retrieve_from_memory("task")}
@@ -85,30 +120,19 @@ Task: {node.retrieve_from_memory("task")}
 Result: {node.output}
 """
         try:
-            response = st.session_state.agent.llm.generate_content(
-                prompt,
-                generation_config=st.session_state.llm_config
-            )
-            response_content = response.text
-
-            if response_content is not None and isinstance(response_content, str):
-                summary_json = json.loads(response_content)
-                task_summary = summary_json.get("task_summary", "Task summary not available.")
-                result_summary = summary_json.get("result_summary", "Result summary not available.")
-                new_context = f"\n- Node {node.node_id} ({node.status}): Task: {task_summary}, Result: {result_summary}"
-                st.session_state.agent.global_memory.update_context(st.session_state.agent.global_memory.get_context() + new_context)
-            else:
-                new_context = f"\n- Node {node.node_id} ({node.status}): Error: LLM returned None or non-string response."
-                st.session_state.agent.global_memory.update_context(st.session_state.agent.global_memory.get_context() + new_context)
-                st.error(f"Error during summarization of node {node.node_id}: LLM returned None or non-string.")
+            summary_json = _generate_json(agent.llm, prompt)
+            task_summary = summary_json.get("task_summary", "Task summary not available.")
+            result_summary = summary_json.get("result_summary", "Result summary not available.")
+            new_context = f"\n- Node {node.node_id} ({node.status}): Task: {task_summary}, Result: {result_summary}"
+            agent.global_memory.update_context(agent.global_memory.get_context() + new_context)
 
         except (json.JSONDecodeError, KeyError, Exception) as e:
             new_context = f"\n- Node {node.node_id} ({node.status}): Error during summarization: {e}"
-            st.session_state.agent.global_memory.update_context(st.session_state.agent.global_memory.get_context() + new_context)
+            agent.global_memory.update_context(agent.global_memory.get_context() + new_context)
             st.error(f"Error during summarization of node {node.node_id}: {e}")
 
-        st.session_state.agent.execution_count += 1
-        if st.session_state.agent.execution_count % st.session_state.agent.global_context_summary_interval == 0:
+        agent.execution_count += 1
+        if agent.execution_count % agent.global_context_summary_interval == 0:
             self._summarize_global_context()
 
     def get_global_context(self) -> str:
@@ -149,9 +173,8 @@ Result: {node.output}
     def _check_has_code(self, constraint_value: str, node: "Node") -> bool:
         """Checks if the output has code blocks in the expected format."""
         # Look for code blocks in markdown format: ```language ... ```
-        code_blocks = re.findall(r'```(\w*)\n(.*?)\n```', node.output, re.DOTALL)
-        
-        if not code_blocks:
+        # Only existence matters, so stop at the first match
+        if not _CODE_BLOCK_RE.search(node.output):
             node.status = STATUS_FAILED
             node.error_message = f"Constraint violated: Output must contain code blocks. No code blocks found."
             return False
@@ -168,8 +191,13 @@ Result: {node.output}
         return True
 
     def remove_node(self, node_id: str) -> None:
-        self.dependency_graph.pop(node_id, None)
-        self.constraints.pop(node_id, None)
-        for dependent, sources in self.dependency_graph.items():
-            if node_id in sources:
-                sources.remove(node_id)
+        self.remove_nodes({node_id})
+
+    def remove_nodes(self, node_ids: Set[str]) -> None:
+        """Forget several nodes with a single pass over the dependency graph."""
+        for node_id in node_ids:
+            self.dependency_graph.pop(node_id, None)
+            self.constraints.pop(node_id, None)
+        for sources in self.dependency_graph.values():
+            if not node_ids.isdisjoint(sources):
+                sources[:] = [source for source in sources if source not in node_ids]
@@ -49,6 +49,69 @@ CODE_LANGUAGES = {
     "sql": "sql"
 }
 
+# Editor languages as (extension, language, ace editor mode)
+EDITOR_LANGUAGES = (
+    (".py", "python", "python"),
+    (".js", "javascript", "javascript"),
+    (".ts", "typescript", "typescript"),
+    (".html", "html", "html"),
+    (".css", "css", "css"),
+    (".json", "json", "json"),
+    (".md", "markdown", "markdown"),
+    (".java", "java", "java"),
+    (".cpp", "cpp", "c_cpp"),
+    (".c", "c", "c_cpp"),
+    (".cs", "csharp", "csharp"),
+    (".go", "go", "golang"),
+    (".rs", "rust", "rust"),
+    (".php", "php", "php"),
+)
+EXT_TO_LANG = {ext: lang for ext, lang, _ in EDITOR_LANGUAGES}
+LANG_TO_EXT = {lang: ext for ext, lang, _ in EDITOR_LANGUAGES}
+LANG_TO_ACE = {lang: mode for _, lang, mode in EDITOR_LANGUAGES}
+
+# Reference links shown in the editor's Documentation tab
+DOCS_MARKDOWN = {
+    "python": """
+### Python Resources
+- [Python Official Documentation](https://docs.python.org/3/)
+- [PEP 8 Style Guide](https://peps.python.org/pep-0008/)
+- [Python Standard Library](https://docs.python.org/3/library/index.html)
+- [Python Tutorial](https://docs.python.org/3/tutorial/index.html)
+
+### Common Libraries
+- [NumPy](https://numpy.org/doc/stable/)
+- [Pandas](https://pandas.pydata.org/docs/)
+- [Matplotlib](https://matplotlib.org/stable/contents.html)
+- [TensorFlow](https://www.tensorflow.org/api_docs)
+- [PyTorch](https://pytorch.org/docs/stable/index.html)
+- [Streamlit](https://docs.streamlit.io/)
+""",
+    "javascript": """
+### JavaScript Resources
+- [MDN Web Docs](https://developer.mozilla.org/en-US/docs/Web/JavaScript)
+- [JavaScript.info](https://javascript.info/)
+- [ECMAScript Specifications](https://www.ecma-international.org/publications-and-standards/standards/ecma-262/)
+
+### Common Libraries & Frameworks
+- [React](https://reactjs.org/docs/getting-started.html)
+- [Vue.js](https://vuejs.org/guide/introduction.html)
+- [Angular](https://angular.io/docs)
+- [Node.js](https://nodejs.org/en/docs/)
+- [Express](https://expressjs.com/en/4x/api.html)
+""",
+    "html": """
+### HTML Resources
+- [MDN HTML Documentation](https://developer.mozilla.org/en-US/docs/Web/HTML)
+- [W3C HTML Specification](https://html.spec.whatwg.org/)
+- [HTML Living Standard](https://html.spec.whatwg.org/multipage/)
+
+### Related Technologies
+- [CSS Documentation](https://developer.mozilla.org/en-US/docs/Web/CSS)
+- [HTML5 Features](https://developer.mozilla.org/en-US/docs/Web/Guide/HTML/HTML5)
+""",
+}
+
 # Prompt Templates
 CODE_PROMPT_TEMPLATE = """
 When generating code:
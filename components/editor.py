@@ -1,52 +1,149 @@
 import streamlit as st
 import os
-import re
-import tempfile
+import sys
+import functools
+import shutil
+import signal
 import subprocess
+import tempfile
 from pathlib import Path
 
+from components.constants import EXT_TO_LANG, LANG_TO_EXT, LANG_TO_ACE, DOCS_MARKDOWN
+from components.utils import atomic_write
+
+# Imported here, not in the preexec_fn: importing a module between fork and
+# exec of a multithreaded process can deadlock on locks held by other threads
+if os.name != 'nt':
+    import resource
+else:
+    resource = None
+
+# Executables resolved once on PATH rather than probed per click
+_PYTHON = sys.executable
+_NODE = shutil.which("node")
+_BLACK = shutil.which("black")
+
+# Limits for user code started with the Run button
+RUN_TIMEOUT = 10
+RUN_CPU_SECONDS = 5
+RUN_MEMORY_LIMIT = 512 * 1024 * 1024
+RUN_OUTPUT_LIMIT = 1 << 20
+
+
+def _limit_child_resources(memory_limit=RUN_MEMORY_LIMIT):
+    """Apply rlimits in the child process before exec (POSIX only)."""
+    resource.setrlimit(resource.RLIMIT_CPU, (RUN_CPU_SECONDS, RUN_CPU_SECONDS))
+    if memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def _extract_fenced_blocks(text):
+    """Return the bodies of ``` fenced blocks, skipping each fence's info line.
+    
+    A plain str.find scan keeps this linear on long LLM responses.
+    """
+    blocks = []
+    pos = 0
+    while True:
+        start = text.find('```', pos)
+        if start < 0:
+            break
+        body_start = text.find('\n', start + 3)
+        if body_start < 0:
+            break
+        end = text.find('```', body_start + 1)
+        if end < 0:
+            break
+        blocks.append(text[body_start + 1:end])
+        pos = end + 3
+    return blocks
+
+
+def _read_capped(stream, limit=RUN_OUTPUT_LIMIT):
+    """Read at most `limit` bytes of captured output as text."""
+    stream.seek(0)
+    data = stream.read(limit)
+    truncated = bool(stream.read(1))
+    text = data.decode('utf-8', errors='replace')
+    if truncated:
+        text += f"\n... output truncated at {limit // 1024} KB ..."
+    return text
+
+
+# Language-specific editor features
+_LANGUAGE_FEATURES = {
+    'python': {
+        'snippets': {
+            'class': 'class MyClass:\n    def __init__(self):\n        pass\n        \n    def my_method(self):\n        pass',
+            'function': 'def my_function(arg1, arg2=None):\n    """\n    Function description\n    \n    Args:\n        arg1: Description\n        arg2: Description\n        \n    Returns:\n        Return value description\n    """\n    return arg1',
+            'if': 'if condition:\n    pass\nelse:\n    pass',
+            'for': 'for item in items:\n    pass',
+            'try': 'try:\n    # code\nexcept Exception as e:\n    print(f"Error: {e}")',
+            'import': 'import module\nfrom module import submodule'
+        },
+        'extension': '.py',
+        'comment': '# '
+    },
+    'javascript': {
+        'snippets': {
+            'function': 'function myFunction(arg1, arg2) {\n    // Function body\n    return arg1;\n}',
+            'arrow': 'const myFunction = (arg1, arg2) => {\n    // Function body\n    return arg1;\n};',
+            'class': 'class MyClass {\n    constructor() {\n        // Constructor\n    }\n    \n    myMethod() {\n        // Method body\n    }\n}',
+            'if': 'if (condition) {\n    // code\n} else {\n    // code\n}',
+            'for': 'for (let i = 0; i < items.length; i++) {\n    const item = items[i];\n    // code\n}',
+            'try': 'try {\n    // code\n} catch (error) {\n    console.error(`Error: ${error}`);\n}'
+        },
+        'extension': '.js',
+        'comment': '// '
+    },
+    'html': {
+        'snippets': {
+            'template': '<!DOCTYPE html>\n<html lang="en">\n<head>\n    <meta charset="UTF-8">\n    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n    <title>Document</title>\n</head>\n<body>\n    \n</body>\n</html>',
+            'div': '<div class="container">\n    \n</div>',
+            'link': '<link rel="stylesheet" href="styles.css">',
+            'script': '<script src="script.js"></script>',
+        },
+        'extension': '.html',
+        'comment': '<!-- -->'
+    }
+}
+
+# Snippet dropdown options per language, built once
+_SNIPPET_MENU = {
+    lang: ("Select snippet...", *features['snippets'])
+    for lang, features in _LANGUAGE_FEATURES.items()
+}
+
+_NEW_FILE_LANGUAGES = ("Python", "JavaScript", "HTML", "CSS", "Text")
+
+# Starter content for new files per language
+_FILE_TEMPLATES = {
+    'python': '#!/usr/bin/env python3\n\n"""\nDescription: \n\nAuthor: \nDate: \n"""\n\n\ndef main():\n    print("Hello, world!")\n\n\nif __name__ == "__main__":\n    main()\n',
+    'javascript': '/**\n * Description: \n * \n * @author \n */\n\nconst main = () => {\n    console.log("Hello, world!");\n};\n\nmain();\n',
+    'html': '<!DOCTYPE html>\n<html lang="en">\n<head>\n    <meta charset="UTF-8">\n    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n    <title>Document</title>\n</head>\n<body>\n    <h1>Hello, world!</h1>\n</body>\n</html>',
+    'css': '/* \n * Description: \n * Author: \n */\n\nbody {\n    font-family: Arial, sans-serif;\n    margin: 0;\n    padding: 0;\n    background-color: #f0f0f0;\n}\n',
+}
+
+# Tasks offered by the AI code assistant
+_ASSISTANT_TASKS = (
+    "Generate comments for my code",
+    "Optimize this code",
+    "Add error handling",
+    "Explain how this code works",
+    "Find potential bugs",
+    "Convert to a different language",
+    "Custom task",
+)
+
+_CONVERSION_TARGETS = ("Python", "JavaScript", "TypeScript", "Java", "C++", "C#")
+
+
 class Editor:
+    language_features = _LANGUAGE_FEATURES
+    
     def __init__(self):
         self.current_file = None
         self.content = ""
-        
-        # Define language-specific features
-        self.language_features = {
-            'python': {
-                'snippets': {
-                    'class': 'class MyClass:\n    def __init__(self):\n        pass\n        \n    def my_method(self):\n        pass',
-                    'function': 'def my_function(arg1, arg2=None):\n    """\n    Function description\n    \n    Args:\n        arg1: Description\n        arg2: Description\n        \n    Returns:\n        Return value description\n    """\n    return arg1',
-                    'if': 'if condition:\n    pass\nelse:\n    pass',
-                    'for': 'for item in items:\n    pass',
-                    'try': 'try:\n    # code\nexcept Exception as e:\n    print(f"Error: {e}")',
-                    'import': 'import module\nfrom module import submodule'
-                },
-                'extension': '.py',
-                'comment': '# '
-            },
-            'javascript': {
-                'snippets': {
-                    'function': 'function myFunction(arg1, arg2) {\n    // Function body\n    return arg1;\n}',
-                    'arrow': 'const myFunction = (arg1, arg2) => {\n    // Function body\n    return arg1;\n};',
-                    'class': 'class MyClass {\n    constructor() {\n        // Constructor\n    }\n    \n    myMethod() {\n        // Method body\n    }\n}',
-                    'if': 'if (condition) {\n    // code\n} else {\n    // code\n}',
-                    'for': 'for (let i = 0; i < items.length; i++) {\n    const item = items[i];\n    // code\n}',
-                    'try': 'try {\n    // code\n} catch (error) {\n    console.error(`Error: ${error}`);\n}'
-                },
-                'extension': '.js',
-                'comment': '// '
-            },
-            'html': {
-                'snippets': {
-                    'template': '<!DOCTYPE html>\n<html lang="en">\n<head>\n    <meta charset="UTF-8">\n    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n    <title>Document</title>\n</head>\n<body>\n    \n</body>\n</html>',
-                    'div': '<div class="container">\n    \n</div>',
-                    'link': '<link rel="stylesheet" href="styles.css">',
-                    'script': '<script src="script.js"></script>',
-                },
-                'extension': '.html',
-                'comment': '<!-- -->'
-            }
-        }
     
     def display(self):
         # Remove the header since it's now in a sticky header in app.py
@@ -96,16 +193,17 @@ class Editor:
                     snippets = self.language_features[language]['snippets']
                     selected_snippet = st.selectbox(
                         "Insert snippet:", 
-                        ["Select snippet..."] + list(snippets.keys()),
+                        _SNIPPET_MENU[language],
                         key="snippet_selector"
                     )
                     
-                    if selected_snippet != "Select snippet..." and st.button("Insert"):
+                    if selected_snippet != "Select snippet..." and st.button("Insert", key="insert_snippet"):
                         snippet_content = snippets[selected_snippet]
                         current_content = st.session_state.file_content
                         # Insert at cursor position (not implemented here) or append
-                        st.session_state.file_content = current_content + "\n" + snippet_content
-                        st.experimental_rerun()
+                        # The editor below renders from file_content later in this run,
+                        # so no rerun is needed to pick up the snippet
+                        st.session_state.file_content = "\n".join((current_content, snippet_content))
             
             # Text editor with the file content
             # Try to use streamlit-ace if available for better IDE features
@@ -168,10 +266,9 @@ class Editor:
             
             # Create new file option
             with st.expander("Create New File"):
-                language_options = ["Python", "JavaScript", "HTML", "CSS", "Text"]
                 selected_language = st.selectbox(
                     "Select language:", 
-                    language_options,
+                    _NEW_FILE_LANGUAGES,
                     key="new_file_language"
                 )
                 
@@ -224,17 +321,7 @@ class Editor:
         if 'current_file' in st.session_state and 'file_content' in st.session_state:
             language = self._detect_language()
             
-            task_options = [
-                "Generate comments for my code",
-                "Optimize this code",
-                "Add error handling",
-                "Explain how this code works",
-                "Find potential bugs",
-                "Convert to a different language",
-                "Custom task"
-            ]
-            
-            selected_task = st.selectbox("Select task:", task_options, key="ai_task")
+            selected_task = st.selectbox("Select task:", _ASSISTANT_TASKS, key="ai_task")
             
             if selected_task == "Custom task":
                 custom_task = st.text_input("Describe what you want the AI to do:")
@@ -244,7 +331,7 @@ class Editor:
             if selected_task == "Convert to a different language":
                 target_language = st.selectbox(
                     "Select target language:", 
-                    ["Python", "JavaScript", "TypeScript", "Java", "C++", "C#"],
+                    _CONVERSION_TARGETS,
                     key="target_language"
                 )
                 selected_task = f"Convert to {target_language}"
@@ -284,8 +371,7 @@ class Editor:
                             # Option to apply changes
                             if st.button("Apply Changes to File"):
                                 # Extract code block
-                                code_pattern = r"```.*?\n(.*?)```"
-                                matches = re.findall(code_pattern, result, re.DOTALL)
+                                matches = _extract_fenced_blocks(result)
                                 if matches:
                                     # Use the first code block
                                     new_code = matches[0]
@@ -309,57 +395,15 @@ class Editor:
         if 'current_file' in st.session_state:
             language = self._detect_language()
             
-            if language == 'python':
-                st.markdown("""
-                ### Python Resources
-                - [Python Official Documentation](https://docs.python.org/3/)
-                - [PEP 8 Style Guide](https://peps.python.org/pep-0008/)
-                - [Python Standard Library](https://docs.python.org/3/library/index.html)
-                - [Python Tutorial](https://docs.python.org/3/tutorial/index.html)
-                
-                ### Common Libraries
-                - [NumPy](https://numpy.org/doc/stable/)
-                - [Pandas](https://pandas.pydata.org/docs/)
-                - [Matplotlib](https://matplotlib.org/stable/contents.html)
-                - [TensorFlow](https://www.tensorflow.org/api_docs)
-                - [PyTorch](https://pytorch.org/docs/stable/index.html)
-                - [Streamlit](https://docs.streamlit.io/)
-                """)
-            elif language == 'javascript':
-                st.markdown("""
-                ### JavaScript Resources
-                - [MDN Web Docs](https://developer.mozilla.org/en-US/docs/Web/JavaScript)
-                - [JavaScript.info](https://javascript.info/)
-                - [ECMAScript Specifications](https://www.ecma-international.org/publications-and-standards/standards/ecma-262/)
-                
-                ### Common Libraries & Frameworks
-                - [React](https://reactjs.org/docs/getting-started.html)
-                - [Vue.js](https://vuejs.org/guide/introduction.html)
-                - [Angular](https://angular.io/docs)
-                - [Node.js](https://nodejs.org/en/docs/)
-                - [Express](https://expressjs.com/en/4x/api.html)
-                """)
-            elif language == 'html':
-                st.markdown("""
-                ### HTML Resources
-                - [MDN HTML Documentation](https://developer.mozilla.org/en-US/docs/Web/HTML)
-                - [W3C HTML Specification](https://html.spec.whatwg.org/)
-                - [HTML Living Standard](https://html.spec.whatwg.org/multipage/)
-                
-                ### Related Technologies
-                - [CSS Documentation](https://developer.mozilla.org/en-US/docs/Web/CSS)
-                - [HTML5 Features](https://developer.mozilla.org/en-US/docs/Web/Guide/HTML/HTML5)
-                """)
-            else:
-                st.write(f"Documentation for {language} will be displayed here.")
+            st.markdown(DOCS_MARKDOWN.get(language, f"Documentation for {language} will be displayed here."))
         else:
             st.info("Select a file to see relevant documentation")
     
     def _save_file(self):
         """Save the current file"""
         try:
-            with open(self.current_file, 'w', encoding='utf-8') as f:
-                f.write(st.session_state.file_content)
+            # Swap in a fully written sibling file so a crash never leaves a torn file
+            atomic_write(self.current_file, st.session_state.file_content.encode('utf-8'), fsync=True)
             st.success(f"File saved: {os.path.basename(self.current_file)}")
         except Exception as e:
             st.error(f"Error saving file: {str(e)}")
@@ -368,7 +412,7 @@ class Editor:
         """Format code based on language"""
         language = self._detect_language()
         
-        if language == 'python':
+        if language == 'python' and _BLACK:
             try:
                 # Try to use black for Python formatting
                 with tempfile.NamedTemporaryFile(suffix=".py", mode='w+', delete=False) as tmp:
@@ -376,7 +420,7 @@ class Editor:
                     tmp_path = tmp.name
                 
                 try:
-                    subprocess.run(["black", tmp_path], check=True, capture_output=True)
+                    subprocess.run([_BLACK, tmp_path], check=True, capture_output=True)
                     with open(tmp_path, 'r') as f:
                         formatted_code = f.read()
                     st.session_state.file_content = formatted_code
@@ -404,56 +448,67 @@ class Editor:
         file_path = self.current_file
         
         if language == 'python':
-            with st.spinner("Running Python code..."):
-                try:
-                    result = subprocess.run(
-                        ["python", file_path],
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
-                    
-                    st.subheader("Execution Result")
-                    if result.stdout:
-                        st.text("Output:")
-                        st.code(result.stdout)
-                    if result.stderr:
-                        st.text("Errors:")
-                        st.error(result.stderr)
-                    
-                    st.info(f"Process exited with code {result.returncode}")
-                    
-                except subprocess.TimeoutExpired:
-                    st.error("Execution timed out (10s limit)")
-                except Exception as e:
-                    st.error(f"Error executing code: {str(e)}")
-                    
-        elif language == 'javascript' and os.path.exists("node"):
-            with st.spinner("Running JavaScript code with Node.js..."):
-                try:
-                    result = subprocess.run(
-                        ["node", file_path],
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
-                    
-                    st.subheader("Execution Result")
-                    if result.stdout:
-                        st.text("Output:")
-                        st.code(result.stdout)
-                    if result.stderr:
-                        st.text("Errors:")
-                        st.error(result.stderr)
-                    
-                    st.info(f"Process exited with code {result.returncode}")
-                    
-                except subprocess.TimeoutExpired:
-                    st.error("Execution timed out (10s limit)")
-                except Exception as e:
-                    st.error(f"Error executing code: {str(e)}")
+            args = [_PYTHON, file_path]
+            spinner_text = "Running Python code..."
+            memory_limit = RUN_MEMORY_LIMIT
+        elif language == 'javascript' and _NODE:
+            args = [_NODE, file_path]
+            spinner_text = "Running JavaScript code with Node.js..."
+            # V8 reserves far more address space than it touches, so only cap CPU
+            memory_limit = None
         else:
             st.warning(f"Running {language} files not supported in the IDE")
+            return
+        
+        with st.spinner(spinner_text):
+            try:
+                stdout, stderr, returncode = self._run_sandboxed(args, memory_limit)
+                
+                st.subheader("Execution Result")
+                if stdout:
+                    st.text("Output:")
+                    st.code(stdout)
+                if stderr:
+                    st.text("Errors:")
+                    st.error(stderr)
+                
+                st.info(f"Process exited with code {returncode}")
+                
+            except subprocess.TimeoutExpired:
+                st.error(f"Execution timed out ({RUN_TIMEOUT}s limit)")
+            except Exception as e:
+                st.error(f"Error executing code: {str(e)}")
+    
+    def _run_sandboxed(self, args, memory_limit=RUN_MEMORY_LIMIT):
+        """Run a command with CPU/memory limits and capped output.
+        
+        Returns a (stdout, stderr, returncode) tuple. Output is spooled to
+        temporary files so a runaway print loop can't balloon memory.
+        """
+        preexec_fn = None
+        if os.name != 'nt':
+            preexec_fn = functools.partial(_limit_child_resources, memory_limit)
+        
+        with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+            process = subprocess.Popen(
+                args,
+                stdout=out,
+                stderr=err,
+                preexec_fn=preexec_fn,
+                start_new_session=True
+            )
+            try:
+                process.wait(timeout=RUN_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                # Kill the whole session so children spawned by the script go too
+                if os.name != 'nt':
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+                process.wait()
+                raise
+            
+            return _read_capped(out), _read_capped(err), process.returncode
     
     def _format_with_ai(self):
         """Format code using the AI model"""
@@ -476,8 +531,7 @@ class Editor:
                     )
                     
                     # Extract code from response
-                    code_pattern = r"```.*?\n(.*?)```"
-                    matches = re.findall(code_pattern, response.text, re.DOTALL)
+                    matches = _extract_fenced_blocks(response.text)
                     if matches:
                         formatted_code = matches[0]
                         st.session_state.file_content = formatted_code
@@ -501,71 +555,17 @@ class Editor:
     
     def _detect_language_from_extension(self, file_ext: str) -> str:
         """Detect language from file extension"""
-        extension_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.ts': 'typescript',
-            '.html': 'html',
-            '.css': 'css',
-            '.json': 'json',
-            '.md': 'markdown',
-            '.java': 'java',
-            '.cpp': 'cpp',
-            '.c': 'c',
-            '.cs': 'csharp',
-            '.go': 'go',
-            '.rs': 'rust',
-            '.php': 'php'
-        }
-        return extension_map.get(file_ext, 'text')
+        return EXT_TO_LANG.get(file_ext, 'text')
     
     def _get_ace_mode(self, language: str) -> str:
         """Convert language to ace editor mode"""
         # Ace editor uses slightly different mode names than our internal ones
-        mode_map = {
-            'python': 'python',
-            'javascript': 'javascript',
-            'typescript': 'typescript',
-            'html': 'html',
-            'css': 'css',
-            'json': 'json',
-            'markdown': 'markdown',
-            'java': 'java',
-            'cpp': 'c_cpp',
-            'c': 'c_cpp',
-            'csharp': 'csharp',
-            'go': 'golang',
-            'rust': 'rust',
-            'php': 'php'
-        }
-        return mode_map.get(language, 'text')
+        return LANG_TO_ACE.get(language, 'text')
     
     def _get_extension_for_language(self, language: str) -> str:
         """Get file extension for language"""
-        extension_map = {
-            'python': '.py',
-            'javascript': '.js',
-            'typescript': '.ts',
-            'html': '.html',
-            'css': '.css',
-            'json': '.json',
-            'markdown': '.md',
-            'java': '.java',
-            'cpp': '.cpp',
-            'c': '.c',
-            'csharp': '.cs',
-            'go': '.go',
-            'rust': '.rs',
-            'php': '.php'
-        }
-        return extension_map.get(language, '.txt')
+        return LANG_TO_EXT.get(language, '.txt')
     
     def _get_template_for_language(self, language: str) -> str:
         """Get template for new file based on language"""
-        templates = {
-            'python': '#!/usr/bin/env python3\n\n"""\nDescription: \n\nAuthor: \nDate: \n"""\n\n\ndef main():\n    print("Hello, world!")\n\n\nif __name__ == "__main__":\n    main()\n',
-            'javascript': '/**\n * Description: \n * \n * @author \n */\n\nconst main = () => {\n    console.log("Hello, world!");\n};\n\nmain();\n',
-            'html': '<!DOCTYPE html>\n<html lang="en">\n<head>\n    <meta charset="UTF-8">\n    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n    <title>Document</title>\n</head>\n<body>\n    <h1>Hello, world!</h1>\n</body>\n</html>',
-            'css': '/* \n * Description: \n * Author: \n */\n\nbody {\n    font-family: Arial, sans-serif;\n    margin: 0;\n    padding: 0;\n    background-color: #f0f0f0;\n}\n',
-        }
-        return templates.get(language, '')
+        return _FILE_TEMPLATES.get(language, '')
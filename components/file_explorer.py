@@ -2,66 +2,79 @@ import streamlit as st
 import os
 from pathlib import Path
 
+from components.utils import file_suffix
+
+# Common file types and their languages for syntax highlighting
+_FILE_EXT_TO_LANG = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.html': 'html',
+    '.css': 'css',
+    '.json': 'json',
+    '.md': 'markdown',
+    '.yaml': 'yaml',
+    '.yml': 'yml',
+    '.txt': 'text',
+    '.csv': 'csv',
+    '.sh': 'bash',
+    '.java': 'java',
+    '.cpp': 'c++',
+    '.c': 'c',
+    '.h': 'h',
+    '.rs': 'rust'
+}
+
+# Reverse lookup for the new-file form; the first extension listed wins
+_LANG_TO_EXT = {lang: ext for ext, lang in reversed(_FILE_EXT_TO_LANG.items())}
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _scan_dir(root_path, mtime_ns):
+    """Read one directory level; cached per (path, mtime) across reruns.
+
+    mtime_ns is only part of the cache key: creating or deleting an entry
+    bumps the directory's mtime, which invalidates the cached listing.
+    """
+    # One scandir pass and one sort: directories first, then files, each by
+    # name. DirEntry.is_dir() reuses the d_type from readdir.
+    with os.scandir(root_path) as it:
+        entries = sorted((not entry.is_dir(), entry.name, entry.path) for entry in it)
+
+    return [
+        {
+            "name": name,
+            "type": "file" if is_file else "directory",
+            "path": path,
+            "depth": 0
+        }
+        for is_file, name, path in entries
+    ]
+
+
 class FileExplorer:
+    file_extensions = _FILE_EXT_TO_LANG
+    lang_to_ext = _LANG_TO_EXT
+
     def __init__(self, root_path):
         self.root_path = root_path
-        # Common file types and their languages for syntax highlighting
-        self.file_extensions = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.html': 'html',
-            '.css': 'css',
-            '.json': 'json',
-            '.md': 'markdown',
-            '.yaml': 'yaml',
-            '.yml': 'yml',
-            '.txt': 'text',
-            '.csv': 'csv',
-            '.sh': 'bash',
-            '.java': 'java',
-            '.cpp': 'c++',
-            '.c': 'c',
-            '.h': 'h',
-            '.rs': 'rust'
-        }
 
     def get_file_tree(self):
-        file_tree = []
-        for root, dirs, files in os.walk(self.root_path):
-            rel_path = os.path.relpath(root, self.root_path)
-            depth = rel_path.count(os.sep)
-            if rel_path == ".":
-                rel_path = ""  # Avoid displaying "." for the root directory
-                depth = 0
-
-            # Only add items at the current level
-            if depth == 0:
-                for dir_name in sorted(dirs):
-                    file_tree.append({
-                        "name": dir_name,
-                        "type": "directory",
-                        "path": os.path.join(root, dir_name),
-                        "depth": depth
-                    })
-                for file_name in sorted(files):
-                    file_tree.append({
-                        "name": file_name,
-                        "type": "file",
-                        "path": os.path.join(root, file_name),
-                        "depth": depth
-                    })
-        return file_tree
+        """List the immediate folders and files of root_path, folders first."""
+        return _scan_dir(self.root_path, os.stat(self.root_path).st_mtime_ns)
  
     def display_file_tree(self):
         """Display the file tree without nested expanders"""
-        # Get all directories for folder navigation
-        directories = []
-        for root, dirs, _ in os.walk(self.root_path):
-            for dir_name in dirs:
-                full_path = os.path.join(root, dir_name)
-                rel_path = os.path.relpath(full_path, self.root_path)
-                directories.append((rel_path, full_path))
-        
+        # Read the directory once and split it for the Folders/Files sections below
+        dirs, files = [], []
+        try:
+            tree = self.get_file_tree()
+        except OSError as e:
+            # e.g. an unreadable directory; show it as empty instead of failing the page
+            st.error(f"Error reading directory: {str(e)}")
+            tree = []
+        for item in tree:
+            (dirs if item["type"] == "directory" else files).append(item)
+
         # Show current path
         st.write(f"**Current Directory:** {os.path.basename(self.root_path)}")
 
@@ -92,17 +105,15 @@ class FileExplorer:
                     if st.form_submit_button("Create File"):
                         if new_file_name:
                             # Add extension if not provided
-                            if not os.path.splitext(new_file_name)[1]:
-                                for ext, lang in self.file_extensions.items():
-                                    if lang == file_type:
-                                        new_file_name += ext
-                                        break
+                            if not file_suffix(new_file_name):
+                                new_file_name += self.lang_to_ext.get(file_type, "")
 
                             new_file_path = os.path.join(self.root_path, new_file_name)
                             try:
                                 # Create the file
                                 with open(new_file_path, 'w', encoding='utf-8') as f:
                                     f.write("")  # Create an empty file
+                                _scan_dir.clear()
                                 st.success(f"File created: {new_file_name}")
                                 st.session_state.show_new_file_form = False
                                 st.rerun()
@@ -126,6 +137,7 @@ class FileExplorer:
                             new_folder_path = os.path.join(self.root_path, new_folder_name)
                             try:
                                 os.makedirs(new_folder_path, exist_ok=True)
+                                _scan_dir.clear()
                                 st.success(f"Folder created: {new_folder_name}")
                                 st.session_state.show_new_folder_form = False
                                 st.rerun()
@@ -140,55 +152,40 @@ class FileExplorer:
 
         # List directories first
         st.write("**Folders:**")
-        dirs_found = False
-
-        for root, dirs, _ in os.walk(self.root_path):
-            # Only process immediate subdirectories of the current directory
-            if root == self.root_path:
-                if not dirs:
-                    st.write("*(No folders)*")
-                else:
-                    dirs_found = True
-                    for dir_name in sorted(dirs):
-                        dir_path = os.path.join(root, dir_name)
-                        if st.button(f"📁 {dir_name}", key=f"dir_{dir_path}"):
-                            st.session_state.explorer_dir = dir_path
-                            st.rerun()
-            break  # Only process the top level
+        if not dirs:
+            st.write("*(No folders)*")
+        for item in dirs:
+            if st.button(f"📁 {item['name']}", key=f"dir_{item['path']}"):
+                st.session_state.explorer_dir = item["path"]
+                st.rerun()
 
         # List files
         st.write("**Files:**")
-        files_found = False
-
-        for root, _, files in os.walk(self.root_path):
-            # Only process files in the current directory
-            if root == self.root_path:
-                if not files:
-                    st.write("*(No files)*")
-                else:
-                    files_found = True
-                    for file_name in sorted(files):
-                        file_path = os.path.join(root, file_name)
-                        if st.button(f"📄 {file_name}", key=f"file_{file_path}"):
-                            self.display_file_content(file_path)
-            break  # Only process the top level
+        if not files:
+            st.write("*(No files)*")
+        for item in files:
+            if st.button(f"📄 {item['name']}", key=f"file_{item['path']}"):
+                self.display_file_content(item["path"])
 
     def display_file_content(self, file_path):
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
-                content = file.read()
-                st.session_state.current_file = file_path
-                st.session_state.file_content = content
+            # One unbuffered read of the raw bytes, decoded once
+            with open(file_path, 'rb', buffering=0) as file:
+                content = file.read().decode('utf-8', errors='replace')
+            # Keep the universal-newline behaviour of text mode
+            if '\r' in content:
+                content = content.replace('\r\n', '\n').replace('\r', '\n')
+
+            st.session_state.current_file = file_path
+            st.session_state.file_content = content
 
-                # Store file extension for syntax highlighting
-                file_ext = os.path.splitext(file_path)[1].lower()
-                st.session_state.current_file_language = self.file_extensions.get(file_ext, 'text')
+            # Store file extension for syntax highlighting
+            st.session_state.current_file_language = self.get_file_language(file_path)
 
-                # Signal that a file has been selected
-                st.session_state.file_selected = True
+            # Signal that a file has been selected
+            st.session_state.file_selected = True
         except Exception as e:
             st.error(f"Error opening file: {str(e)}")
             
     def get_file_language(self, file_path):
-        file_ext = os.path.splitext(file_path)[1].lower()
-        return self.file_extensions.get(file_ext, 'text')
+        return self.file_extensions.get(file_suffix(file_path), 'text')
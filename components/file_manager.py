@@ -3,39 +3,64 @@ import re
 from typing import Dict, List, Optional
 import streamlit as st
 
+from components.utils import extract_code_with_filenames, file_suffix
+
+# Extension (without dot) to syntax-highlighting language
+_LANGUAGE_MAP = {
+    "py": "python",
+    "js": "javascript",
+    "ts": "typescript",
+    "html": "html",
+    "css": "css",
+    "json": "json",
+    "md": "markdown",
+    "txt": "text",
+    # Add more mappings as needed
+}
+
 class FileManager:
     """Handles file operations like creating, updating, and deleting files."""
     
+    language_map = _LANGUAGE_MAP
+    
     def __init__(self):
         self.base_path = "e:\\Projects\\smartAgent"
-        self.language_map = {
-            "py": "python",
-            "js": "javascript",
-            "ts": "typescript",
-            "html": "html",
-            "css": "css",
-            "json": "json",
-            "md": "markdown",
-            "txt": "text",
-            # Add more mappings as needed
-        }
+        # Directories this instance has already created or seen to exist
+        self._known_dirs: set = set()
     
     def extract_code_blocks(self, text: str) -> Dict[str, str]:
         """
         Extract code blocks with filepath comments from text.
         Returns a dictionary mapping filepath to code content.
         """
-        from components.utils import extract_code_with_filenames
-        
-        code_files = {}
-        extracted = extract_code_with_filenames(text)
-        
         # Convert to simple filepath -> content mapping
-        for filepath, info in extracted.items():
-            code_files[filepath] = info["content"]
+        code_files = {
+            filepath: info["content"]
+            for filepath, info in extract_code_with_filenames(text).items()
+        }
                 
         return code_files
     
+    def _ensure_dir(self, directory: str) -> None:
+        """Create directory (and parents) unless it is already known to exist."""
+        if directory not in self._known_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._known_dirs.add(directory)
+    
+    def _write_text(self, filepath: str, content: str) -> None:
+        """Write content to filepath, creating its directory on first use."""
+        directory = os.path.dirname(filepath)
+        self._ensure_dir(directory)
+        try:
+            f = open(filepath, 'w', encoding='utf-8')
+        except FileNotFoundError:
+            # The directory was removed since we last saw it
+            self._known_dirs.discard(directory)
+            self._ensure_dir(directory)
+            f = open(filepath, 'w', encoding='utf-8')
+        with f:
+            f.write(content)
+    
     def save_file(self, filepath: str, content: str) -> bool:
         """Save content to a file, creating directories if needed."""
         try:
@@ -43,14 +68,8 @@ class FileManager:
             if not filepath.startswith(self.base_path):
                 filepath = os.path.join(self.base_path, filepath.lstrip('/\\'))
             
-            # Ensure directory exists
-            directory = os.path.dirname(filepath)
-            os.makedirs(directory, exist_ok=True)
-            
-            # Write the file
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-                
+            # Write the file, creating its directory if needed
+            self._write_text(filepath, content)
             return True
         except Exception as e:
             st.error(f"Error saving file {filepath}: {str(e)}")
@@ -63,11 +82,11 @@ class FileManager:
             if not filepath.startswith(self.base_path):
                 filepath = os.path.join(self.base_path, filepath.lstrip('/\\'))
                 
-            if not os.path.exists(filepath):
-                return None
-                
+            # Let open() report a missing file instead of stat-ing first
             with open(filepath, 'r', encoding='utf-8') as f:
                 return f.read()
+        except FileNotFoundError:
+            return None
         except Exception as e:
             st.error(f"Error reading file {filepath}: {str(e)}")
             return None
@@ -79,19 +98,17 @@ class FileManager:
             if not filepath.startswith(self.base_path):
                 filepath = os.path.join(self.base_path, filepath.lstrip('/\\'))
                 
-            if not os.path.exists(filepath):
-                return False
-                
             os.remove(filepath)
             return True
+        except FileNotFoundError:
+            return False
         except Exception as e:
             st.error(f"Error deleting file {filepath}: {str(e)}")
             return False
             
     def get_language_from_extension(self, filepath: str) -> str:
         """Get the language name from file extension for syntax highlighting."""
-        ext = os.path.splitext(filepath)[1].lstrip('.')
-        return self.language_map.get(ext, "text")
+        return self.language_map.get(file_suffix(filepath)[1:], "text")
 
     def extract_and_save_code_from_response(self, node_output: str) -> Dict[str, str]:
         """
@@ -101,24 +118,23 @@ class FileManager:
         saved_files = {}
         code_files = self.extract_code_blocks(node_output)
         
+        # Normalize every target path up front
+        targets = []
         for filepath, content in code_files.items():
-            try:
-                # Skip if filepath is invalid or suspicious
-                if not filepath or '..' in filepath:
-                    continue
-                    
-                # Ensure the filepath is within the base path
-                if not filepath.startswith(self.base_path):
-                    filepath = os.path.join(self.base_path, filepath.lstrip('/\\'))
+            # Skip if filepath is invalid or suspicious
+            if not filepath or '..' in filepath:
+                continue
                 
-                # Ensure directory exists
-                directory = os.path.dirname(filepath)
-                os.makedirs(directory, exist_ok=True)
+            # Ensure the filepath is within the base path
+            if not filepath.startswith(self.base_path):
+                filepath = os.path.join(self.base_path, filepath.lstrip('/\\'))
+            targets.append((filepath, content))
+        
+        for filepath, content in targets:
+            try:
+                # Write file; each distinct directory is only created once
+                self._write_text(filepath, content)
                 
-                # Write file
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                    
                 saved_files[filepath] = content
                 st.success(f"File created: {filepath}")
             except Exception as e:
@@ -1,11 +1,152 @@
 import streamlit as st
-import networkx as nx
-import matplotlib.pyplot as plt
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
 import io
 import base64
+import shutil
+import subprocess
 
-from components.utils import STATUS_PENDING, STATUS_RUNNING, STATUS_COMPLETED, STATUS_FAILED
+from components.utils import STATUS_PENDING, STATUS_RUNNING, STATUS_COMPLETED, STATUS_FAILED, STATUS_EMOJI, select_node
+
+# Graphs up to this size are sent to the browser as DOT text instead of a PNG
+GRAPHVIZ_CHART_MAX_NODES = 64
+
+# Longest label drawn in the graph and on the node selection buttons
+GRAPH_LABEL_MAX = 30
+BUTTON_LABEL_MAX = 20
+
+# Graphviz's dot binary, used to rasterize larger graphs when installed
+_DOT = shutil.which("dot")
+DOT_TIMEOUT = 30
+
+def _truncate(label: str, limit: int) -> str:
+    """Shorten label to at most limit characters, ending in '...' if cut."""
+    return label if len(label) <= limit else label[:limit - 3] + "..."
+
+class TaskGraph(NamedTuple):
+    """Flat struct-of-arrays view of the task tree; index i describes one node."""
+    node_ids: List[str]
+    parents: List[int]  # index of the parent node, -1 for roots
+    labels: List[str]
+    statuses: List[str]
+    depths: List[int]
+    children: List[List[int]]
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _layout_graph(structure: tuple, root_node_id: str) -> Dict[str, Tuple[float, float]]:
+    """Compute a top-down tree layout for a tree shape; cached across reruns.
+    
+    structure is a tuple of (node_id, parent_id) pairs. Leaves are spaced one
+    unit apart in depth-first order and each parent is centred over its
+    children, so the whole layout is a single O(N) pass.
+    """
+    index = {node_id: i for i, (node_id, _) in enumerate(structure)}
+    children: List[List[int]] = [[] for _ in structure]
+    roots = []
+    for i, (_, parent_id) in enumerate(structure):
+        parent = index.get(parent_id, -1) if parent_id else -1
+        if parent < 0:
+            roots.append(i)
+        else:
+            children[parent].append(i)
+    
+    # Lay out the root node's tree first, then any detached subtrees
+    root = index.get(root_node_id)
+    if root in roots:
+        roots.remove(root)
+        roots.insert(0, root)
+    
+    xs = [0.0] * len(structure)
+    ys = [0.0] * len(structure)
+    next_x = 0.0
+    for root in roots:
+        # Iterative post-order walk: a node is placed after all its children
+        stack = [(root, 0, False)]
+        while stack:
+            i, depth, children_placed = stack.pop()
+            if not children_placed:
+                stack.append((i, depth, True))
+                for child in reversed(children[i]):
+                    stack.append((child, depth + 1, False))
+                continue
+            kids = children[i]
+            if kids:
+                xs[i] = (xs[kids[0]] + xs[kids[-1]]) / 2
+            else:
+                xs[i] = next_x
+                next_x += 1.0
+            ys[i] = -float(depth)
+    
+    return {node_id: (xs[i], ys[i]) for i, (node_id, _) in enumerate(structure)}
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _render_graph_png(nodes: tuple, structure: tuple, root_node_id: str, selected_node_id: Optional[str],
+                      node_size: int, font_size: int) -> bytes:
+    """Draw the task graph with matplotlib and return PNG bytes; cached across reruns.
+    
+    nodes is a tuple of (node_id, label, color) and structure the
+    (node_id, parent_id) pairs used for the layout.
+    """
+    # Imported lazily: pyplot is slow to import and only needed without dot
+    import matplotlib.pyplot as plt
+    
+    pos = _layout_graph(structure, root_node_id)
+    
+    # Create figure and axis
+    fig, ax = plt.subplots(figsize=(10, 8))
+    
+    # Draw edges, stopping the arrows at the node circles
+    node_radius = node_size ** 0.5 / 2
+    for node_id, parent_id in structure:
+        if parent_id in pos:
+            ax.annotate(
+                "", xy=pos[node_id], xytext=pos[parent_id],
+                arrowprops=dict(arrowstyle='-|>', color='gray', lw=1.5,
+                                shrinkA=node_radius, shrinkB=node_radius),
+                zorder=1
+            )
+    
+    # Draw nodes
+    ax.scatter(
+        [pos[node_id][0] for node_id, _, _ in nodes],
+        [pos[node_id][1] for node_id, _, _ in nodes],
+        s=node_size,
+        c=[color for _, _, color in nodes],
+        edgecolors='black',
+        linewidths=1,
+        alpha=0.8,
+        zorder=2
+    )
+    
+    # Highlight selected node if provided
+    if selected_node_id and selected_node_id in pos:
+        x, y = pos[selected_node_id]
+        ax.scatter([x], [y], s=node_size, c='lightblue', edgecolors='blue', linewidths=2, zorder=3)
+    
+    # Draw labels
+    for node_id, label, _ in nodes:
+        x, y = pos[node_id]
+        ax.text(x, y, label, ha='center', va='center', fontsize=font_size, fontweight='bold', zorder=4)
+    
+    ax.axis('off')
+    ax.margins(0.1)
+    fig.tight_layout()
+    
+    # Save the figure to a buffer
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=100)
+    plt.close(fig)
+    return buf.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _render_dot_png(dot: str) -> bytes:
+    """Rasterize a DOT description with the dot binary.
+    
+    Failures raise (OSError or subprocess.SubprocessError) rather than return
+    a value, so st.cache_data never memoizes a transient dot error.
+    """
+    result = subprocess.run([_DOT, "-Tpng"], input=dot.encode("utf-8"),
+                            capture_output=True, timeout=DOT_TIMEOUT, check=True)
+    return result.stdout
 
 class GraphView:
     """Provides visualization for the agent's execution graph."""
@@ -20,33 +161,49 @@ class GraphView:
         self.node_size = 2000
         self.font_size = 8
         
-    def build_graph(self, node_lookup: Dict[str, Any], root_node_id: str) -> nx.DiGraph:
-        """Build a NetworkX directed graph from the node lookup dictionary."""
-        G = nx.DiGraph()
+    def build_graph(self, node_lookup: Dict[str, Any], root_node_id: str) -> TaskGraph:
+        """Build a flat TaskGraph from the node lookup dictionary."""
+        node_ids = list(node_lookup)
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        parents = [-1] * len(node_ids)
+        labels = []
+        statuses = []
+        depths = []
+        children: List[List[int]] = [[] for _ in node_ids]
         
-        # Add nodes with attributes
-        for node_id, node in node_lookup.items():
+        for i, (node_id, node) in enumerate(node_lookup.items()):
             label = node.retrieve_from_memory("task")
             if not label:
                 label = f"Node {node_id[:6]}..."
                 
-            # Truncate label if too long
-            if len(label) > 30:
-                label = label[:27] + "..."
-                
-            G.add_node(
-                node_id, 
-                label=label,
-                status=node.status,
-                depth=node.depth
-            )
+            labels.append(_truncate(label, GRAPH_LABEL_MAX))
+            statuses.append(node.status)
+            depths.append(node.depth)
+            
+            parent = index.get(node.parent_id, -1) if node.parent_id else -1
+            if parent >= 0:
+                parents[i] = parent
+                children[parent].append(i)
         
-        # Add edges
-        for node_id, node in node_lookup.items():
-            if node.parent_id and node.parent_id in node_lookup:
-                G.add_edge(node.parent_id, node_id)
+        return TaskGraph(node_ids, parents, labels, statuses, depths, children)
         
-        return G
+    def _build_dot(self, graph: TaskGraph, selected_node_id: Optional[str] = None) -> str:
+        """Build a Graphviz DOT description of the task graph."""
+        lines = [
+            "digraph {",
+            '  node [shape=box, style="rounded,filled", fontsize=10];',
+            "  edge [color=gray];",
+        ]
+        for node_id, label, status in zip(graph.node_ids, graph.labels, graph.statuses):
+            label = label.replace("\\", "\\\\").replace('"', '\\"')
+            color = self.status_colors.get(status, "white")
+            extra = ', color=blue, penwidth=2' if node_id == selected_node_id else ""
+            lines.append(f'  "{node_id}" [label="{label}", fillcolor="{color}"{extra}];')
+        for node_id, parent in zip(graph.node_ids, graph.parents):
+            if parent >= 0:
+                lines.append(f'  "{graph.node_ids[parent]}" -> "{node_id}";')
+        lines.append("}")
+        return "\n".join(lines)
         
     def render_graph(self, node_lookup: Dict[str, Any], root_node_id: str, selected_node_id: Optional[str] = None) -> None:
         """Render the graph visualization in Streamlit."""
@@ -54,114 +211,61 @@ class GraphView:
             st.warning("No nodes to display in the graph.")
             return
             
-        G = self.build_graph(node_lookup, root_node_id)
-        
-        # Get node positions using hierarchical layout
-        try:
-            # First try to use graphviz layout
-            import pygraphviz
-            pos = nx.nx_agraph.graphviz_layout(G, prog="dot")
-        except (ImportError, Exception) as e:
-            st.info("Using alternative graph layout since pygraphviz is not available. For better hierarchical layouts, install pygraphviz.")
-            # Fallback layout options
-            if hasattr(nx, "planar_layout"):
-                try:
-                    pos = nx.planar_layout(G)
-                except:
-                    # If planar layout fails, try spring layout
-                    pos = nx.spring_layout(G)
-            else:
-                # Tree-like layout for hierarchical data
-                try:
-                    # Create a BFS tree from the root node
-                    T = nx.bfs_tree(G, root_node_id)
-                    pos = nx.drawing.nx_pydot.graphviz_layout(T, prog="dot")
-                except:
-                    # Final fallback to spring layout
-                    pos = nx.spring_layout(G, k=0.5, iterations=100)
-        
-        # Create figure and axis
-        plt.figure(figsize=(10, 8))
+        graph = self.build_graph(node_lookup, root_node_id)
         
-        # Get node colors based on status
-        node_colors = [self.status_colors.get(G.nodes[n]['status'], "white") for n in G.nodes()]
+        if len(graph.node_ids) <= GRAPHVIZ_CHART_MAX_NODES:
+            # Small graphs are rendered client-side from the DOT text
+            st.graphviz_chart(self._build_dot(graph, selected_node_id), use_container_width=True)
+        else:
+            self._render_png(graph, root_node_id, selected_node_id)
         
-        # Draw nodes
-        nx.draw_networkx_nodes(
-            G, pos, 
-            node_color=node_colors,
-            node_size=self.node_size,
-            edgecolors='black',
-            linewidths=1,
-            alpha=0.8
-        )
+        self._render_node_buttons(graph)
+    
+    def _render_png(self, graph: TaskGraph, root_node_id: str, selected_node_id: Optional[str] = None) -> None:
+        """Render the graph as a PNG, for graphs too large for the browser renderer.
         
-        # Highlight selected node if provided
-        if selected_node_id and selected_node_id in G:
-            nx.draw_networkx_nodes(
-                G, pos,
-                nodelist=[selected_node_id],
-                node_color='lightblue',
-                node_size=self.node_size,
-                edgecolors='blue',
-                linewidths=2
-            )
+        Graphviz's dot does the layout and rasterizing when it is on PATH;
+        otherwise the graph is drawn with matplotlib.
+        """
+        if _DOT:
+            try:
+                png = _render_dot_png(self._build_dot(graph, selected_node_id))
+            except (OSError, subprocess.SubprocessError):
+                png = None
+            if png:
+                st.image(png, caption="Task Hierarchy Graph", use_column_width=True)
+                return
         
-        # Draw edges
-        nx.draw_networkx_edges(
-            G, pos, 
-            arrows=True,
-            arrowstyle='-|>',
-            width=1.5,
-            edge_color='gray'
+        # Layout only depends on the tree shape, so status/label changes reuse it
+        structure = tuple(
+            (node_id, graph.node_ids[parent] if parent >= 0 else None)
+            for node_id, parent in zip(graph.node_ids, graph.parents)
         )
         
-        # Draw labels
-        nx.draw_networkx_labels(
-            G, pos,
-            labels={n: G.nodes[n]['label'] for n in G.nodes()},
-            font_size=self.font_size,
-            font_weight='bold'
+        # Colors are resolved here so the cached PNG keys on what is actually drawn
+        nodes = tuple(
+            (node_id, label, self.status_colors.get(status, "white"))
+            for node_id, label, status in zip(graph.node_ids, graph.labels, graph.statuses)
         )
-        
-        plt.axis('off')
-        plt.tight_layout()
-        
-        # Save the figure to a buffer
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150)
-        buf.seek(0)
+        png = _render_graph_png(nodes, structure, root_node_id, selected_node_id, self.node_size, self.font_size)
         
         # Display the figure
-        st.image(buf, caption="Task Hierarchy Graph", use_column_width=True)
-        plt.close()
+        st.image(png, caption="Task Hierarchy Graph", use_column_width=True)
+    
+    def _render_node_buttons(self, graph: TaskGraph) -> None:
+        """Render one selection button per node below the graph."""
+        # Labels and statuses were resolved once in build_graph
+        buttons = [
+            (node_id, f"{STATUS_EMOJI.get(status, '⚪')} {_truncate(label, BUTTON_LABEL_MAX)}")
+            for node_id, label, status in zip(graph.node_ids, graph.labels, graph.statuses)
+        ]
         
         # Create clickable areas for node selection
         st.write("**Click on a node to select it:**")
         cols = st.columns(3)
-        i = 0
-        for node_id in G.nodes():
-            node = node_lookup[node_id]
-            label = node.retrieve_from_memory("task")
-            if not label:
-                label = f"Node {node_id[:6]}..."
-                
-            if len(label) > 20:
-                label = label[:17] + "..."
-                
-            status_color = {
-                STATUS_PENDING: "🔘",
-                STATUS_RUNNING: "⏳",
-                STATUS_COMPLETED: "✅",
-                STATUS_FAILED: "❌",
-            }.get(node.status, "⚪")
-            
+        for i, (node_id, text) in enumerate(buttons):
             with cols[i % 3]:
-                if st.button(f"{status_color} {label}", key=f"graph_node_{node_id}"):
-                    st.session_state.selected_node_id = node_id
-                    st.experimental_rerun()
-            
-            i += 1
+                st.button(text, key=f"graph_node_{node_id}", on_click=select_node, args=(node_id,))
             
     def render_simple_tree(self, node_lookup: Dict[str, Any], root_node_id: str, selected_node_id: Optional[str] = None) -> None:
         """Render a simple tree visualization when graph libraries are not available."""
@@ -169,20 +273,19 @@ class GraphView:
             st.warning("Root node not found.")
             return
         
-        def _render_node(node_id, depth=0):
+        st.write("### Tree View (Alternative to Graph)")
+        
+        # Depth-first walk with an explicit stack; children are pushed in
+        # reverse so they pop in their original order
+        stack = [(root_node_id, 0)]
+        while stack:
+            node_id, depth = stack.pop()
             if node_id not in node_lookup:
-                return
+                continue
             
             node = node_lookup[node_id]
             label = node.retrieve_from_memory("task") or f"Node {node_id[:6]}..."
-            
-            # Determine status indicator
-            status_indicator = {
-                STATUS_PENDING: "🔘",
-                STATUS_RUNNING: "⏳",
-                STATUS_COMPLETED: "✅", 
-                STATUS_FAILED: "❌"
-            }.get(node.status, "⚪")
+            status_indicator = STATUS_EMOJI.get(node.status, "⚪")
             
             # Highlight if selected
             is_selected = (node_id == selected_node_id)
@@ -192,14 +295,8 @@ class GraphView:
             label_text = f"{prefix}{status_indicator} {label}"
             button_style = "primary" if is_selected else "secondary"
             
-            if st.button(label_text, key=f"tree_node_{node_id}", type=button_style):
-                st.session_state.selected_node_id = node_id
-                st.experimental_rerun()
+            st.button(label_text, key=f"tree_node_{node_id}", type=button_style,
+                      on_click=select_node, args=(node_id,))
             
-            # Process children
-            for child_id in node.child_ids:
-                _render_node(child_id, depth + 1)
-        
-        # Render from root
-        st.write("### Tree View (Alternative to Graph)")
-        _render_node(root_node_id)
+            for child_id in reversed(node.child_ids):
+                stack.append((child_id, depth + 1))
@@ -1,6 +1,32 @@
 import os
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; fall back to the stdlib json module
+    orjson = None
+
+from components.utils import atomic_write
+
+
+def _dumps(data: Any, indent: bool = False) -> bytes:
+    """Serialize data to JSON bytes, compact unless indent is set."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    if indent:
+        return json.dumps(data, indent=2).encode("utf-8")
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(raw: bytes) -> Any:
+    """Parse JSON bytes."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
 
 class GlobalMemory:
     """
@@ -30,15 +56,14 @@ class GlobalMemory:
         """Clear all global shared memory."""
         self.shared_data.clear()
         
-    def save_to_disk(self, filename: str = "global_memory.json") -> bool:
+    def save_to_disk(self, filename: str = "global_memory.json", indent: bool = False) -> bool:
         """Save global memory to disk."""
         try:
             data = {
                 "global_context": self.global_context,
                 "shared_data": self.shared_data
             }
-            with open(filename, "w") as f:
-                json.dump(data, f, indent=2)
+            atomic_write(filename, _dumps(data, indent))
             return True
         except Exception:
             return False
@@ -46,11 +71,8 @@ class GlobalMemory:
     def load_from_disk(self, filename: str = "global_memory.json") -> bool:
         """Load global memory from disk."""
         try:
-            if not os.path.exists(filename):
-                return False
-                
-            with open(filename, "r") as f:
-                data = json.load(f)
+            with open(filename, "rb") as f:
+                data = _loads(f.read())
                 
             self.global_context = data.get("global_context", "")
             self.shared_data = data.get("shared_data", {})
@@ -86,14 +108,13 @@ class LocalMemory:
         """Get all data in local memory."""
         return self.local_memory.copy()
         
-    def save_to_disk(self, directory: str = "node_memory") -> bool:
+    def save_to_disk(self, directory: str = "node_memory", indent: bool = False) -> bool:
         """Save local memory to disk."""
         try:
             os.makedirs(directory, exist_ok=True)
             filename = os.path.join(directory, f"{self.node_id}.json")
             
-            with open(filename, "w") as f:
-                json.dump(self.local_memory, f, indent=2)
+            atomic_write(filename, _dumps(self.local_memory, indent))
             return True
         except Exception:
             return False
@@ -103,11 +124,8 @@ class LocalMemory:
         try:
             filename = os.path.join(directory, f"{self.node_id}.json")
             
-            if not os.path.exists(filename):
-                return False
-                
-            with open(filename, "r") as f:
-                self.local_memory = json.load(f)
+            with open(filename, "rb") as f:
+                self.local_memory = _loads(f.read())
             return True
         except Exception:
             return False
@@ -3,15 +3,70 @@ import uuid
 import os
 import re
 import json
+import logging
 from typing import Optional, Dict, Any, List
 from components.memory import LocalMemory
 from components.utils import extract_json_from_text, extract_code_blocks, STATUS_PENDING, STATUS_RUNNING, STATUS_COMPLETED, STATUS_FAILED
 
+logger = logging.getLogger(__name__)
+
+# Instructions at the start of the prompt of root nodes
+_ROOT_INSTRUCTIONS = """
+Instructions:
+1. Decompose the task given below into manageable subtasks in a hierarchical structure
+2. Return your response in JSON format with a 'subtasks' array
+3. Each subtask should be a string describing a specific part of the task
+4. Aim for 3-7 subtasks that collectively solve the main task
+5. Make sure each subtask is clear and focused on a specific aspect
+"""
+
+# Instructions included when the node has a code constraint
+_CODE_INSTRUCTIONS = """
+Code requirements:
+1. Include complete, working code in your response
+2. Format code blocks with proper markdown: ```language
+3. Put file paths in comments at the top of each code block:
+   ```python
+   # filepath: path/to/file.py
+   your code here
+   ```
+4. Ensure code is ready to be directly saved and executed
+5. Include all necessary imports, functions, and components
+"""
+
+# Fenced code block with an optional "# filepath:" comment on its first line
+_CODE_BLOCK_RE = re.compile(
+    r'```(?P<lang>python|javascript|html|css)?\n(?:# filepath:\s*(?P<path>.*?)\n)?(?P<body>.*?)```',
+    re.DOTALL
+)
+_CODE_BLOCK_EXT = {"python": "py", "javascript": "js", "html": "html", "css": "css"}
+
+# Every marker _code_field_ext cares about, found in a single scan of the key
+_CODE_FIELD_RE = re.compile(r'code|implementation|python|html|css|_py$|_js$')
+_CODE_FIELD_MARKERS = frozenset(("code", "implementation", "_py", "_js"))
+
+def _code_field_ext(key_lower: str) -> Optional[str]:
+    """Return the file extension for a JSON code field, or None if key_lower is not one."""
+    found = _CODE_FIELD_RE.findall(key_lower)
+    if not found or _CODE_FIELD_MARKERS.isdisjoint(found):
+        return None
+    if "html" in found:
+        return "html"
+    if "css" in found:
+        return "css"
+    return "py" if "_py" in found or "python" in found else "js"
+
 class Node:
     """
     A node represents a discrete task or step in the agent's execution.
     Each node has its own local memory and can access global memory.
     """
+    __slots__ = (
+        "node_id", "depth", "_local_memory", "parent_id", "_child_ids", "_child_id_set",
+        "status", "output", "error_message", "task_description", "_code_blocks_cache",
+        "_parsed_output",
+    )
+    
     def __init__(self, parent_id: Optional[str] = None, task_description: Optional[str] = None, depth: int = 0):
         """Initialize a new Node.
         
@@ -22,16 +77,45 @@ class Node:
         """
         self.node_id = str(uuid.uuid4())
         self.depth = depth
-        self.local_memory = LocalMemory(self.node_id)
+        self._local_memory: Optional[LocalMemory] = None  # created on first use
         self.parent_id = parent_id
-        self.child_ids: List[str] = []
+        self.child_ids = []
         self.status = STATUS_PENDING
         self.output = ""  # Store raw output
         self.error_message = ""
         self.task_description = task_description
+        # (output, code blocks) from the last extract_code_files scan
+        self._code_blocks_cache = None
+        # (output, parsed JSON) from the last JSON extraction
+        self._parsed_output = None
         
-        if task_description:
-            self.store_in_memory("task", task_description)
+    @property
+    def local_memory(self) -> LocalMemory:
+        """This node's LocalMemory, created the first time it is needed.
+        
+        Until then the task is served from the task_description slot (see
+        retrieve_from_memory); it is copied in when the memory is created.
+        """
+        if self._local_memory is None:
+            self._local_memory = LocalMemory(self.node_id)
+            if self.task_description:
+                self._local_memory.store("task", self.task_description)
+        return self._local_memory
+    
+    @local_memory.setter
+    def local_memory(self, memory: LocalMemory) -> None:
+        self._local_memory = memory
+    
+    @property
+    def child_ids(self) -> List[str]:
+        """IDs of this node's children, in the order they were added."""
+        return self._child_ids
+    
+    @child_ids.setter
+    def child_ids(self, child_ids: List[str]) -> None:
+        # Keep a set alongside the list for O(1) membership checks in add_child
+        self._child_ids = child_ids
+        self._child_id_set = set(child_ids)
         
     def store_in_memory(self, key: str, value: Any) -> None:
         """Store data in this node's local memory."""
@@ -39,18 +123,28 @@ class Node:
         
     def retrieve_from_memory(self, key: str) -> Any:
         """Retrieve data from this node's local memory."""
-        return self.local_memory.retrieve(key)
+        if self._local_memory is None:
+            # Nothing but the task has been stored yet; don't build memory to read it
+            return (self.task_description or None) if key == "task" else None
+        return self._local_memory.retrieve(key)
     
     def add_child(self, child_id: str) -> None:
         """Add a child node ID to this node."""
-        if child_id not in self.child_ids:
-            self.child_ids.append(child_id)
+        if child_id not in self._child_id_set:
+            self._child_id_set.add(child_id)
+            self._child_ids.append(child_id)
     
     def update_status(self, status: str) -> None:
         """Update the status of this node."""
         self.status = status
         self.store_in_memory("status", status)
     
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the node's public attributes as a plain dict."""
+        data = {slot: getattr(self, slot) for slot in self.__slots__ if not slot.startswith("_")}
+        data["child_ids"] = self.child_ids
+        return data
+    
     def get_summary(self) -> Dict[str, Any]:
         """Get a summary of this node's state and memory."""
         return {
@@ -64,10 +158,34 @@ class Node:
     
     def build_prompt(self) -> str:
         """Constructs the prompt for the LLM."""
+        # Session state attribute access goes through Streamlit's proxy, so
+        # read everything needed once
+        session_state = st.session_state
+        agent = session_state.get('agent')
+        attention_mechanism = session_state.get('attention_mechanism')
+        node_lookup = session_state.get('node_lookup', {})
+        constraints = attention_mechanism.get_constraints(self.node_id) if attention_mechanism else []
+        
+        # Fixed instruction blocks go first and per-node text last, so prompts
+        # share the longest possible prefix for the provider's prompt caching
         prompt = []
+        # Add special instructions for root nodes to decompose tasks
+        if self.depth == 0:
+            prompt.append(_ROOT_INSTRUCTIONS)
+        
+        # Add special instructions for code generation if requested
+        if any(constraint.startswith('code') for constraint in constraints):
+            prompt.append(_CODE_INSTRUCTIONS)
+
         # Add global context
-        if 'agent' in st.session_state:
-            prompt.append(st.session_state.agent.global_memory.get_context())
+        if agent is not None:
+            prompt.append(agent.global_memory.get_context())
+
+        # Add constraints
+        if constraints:
+            prompt.append("Constraints:")
+            for constraint in constraints:
+                prompt.append(f"- {constraint}")
 
         # Add task description
         task_description = self.retrieve_from_memory("task")
@@ -76,44 +194,10 @@ class Node:
         
         # Add depth information for hierarchical awareness
         prompt.append(f"Current depth level: {self.depth}")
-        
-        # Add special instructions for root nodes to decompose tasks
-        if self.depth == 0:
-            prompt.append("""
-Instructions:
-1. Decompose this complex task into manageable subtasks in a hierarchical structure
-2. Return your response in JSON format with a 'subtasks' array
-3. Each subtask should be a string describing a specific part of the task
-4. Aim for 3-7 subtasks that collectively solve the main task
-5. Make sure each subtask is clear and focused on a specific aspect
-""")
-        
-        # Add special instructions for code generation if requested
-        if self.has_code_constraint():
-            prompt.append("""
-Code requirements:
-1. Include complete, working code in your response
-2. Format code blocks with proper markdown: ```language
-3. Put file paths in comments at the top of each code block:
-   ```python
-   # filepath: path/to/file.py
-   your code here
-   ```
-4. Ensure code is ready to be directly saved and executed
-5. Include all necessary imports, functions, and components
-""")
-
-        # Add constraints
-        if 'attention_mechanism' in st.session_state and self.node_id in st.session_state.attention_mechanism.constraints:
-            constraints = st.session_state.attention_mechanism.constraints[self.node_id]
-            if constraints:
-                prompt.append("Constraints:")
-                for constraint in constraints:
-                    prompt.append(f"- {constraint}")
 
         # Add parent output if applicable
-        if self.parent_id and self.parent_id in st.session_state.node_lookup:
-            parent_node = st.session_state.node_lookup[self.parent_id]
+        parent_node = node_lookup.get(self.parent_id) if self.parent_id else None
+        if parent_node is not None:
             parent_output = parent_node.output
             if parent_output:
                 prompt.append(f"Output from Parent Node ({parent_node.node_id[:8]}...): {parent_output}")
@@ -128,14 +212,12 @@ Code requirements:
     
     def has_code_constraint(self) -> bool:
         """Check if this node has a code constraint."""
-        if 'attention_mechanism' not in st.session_state:
+        attention_mechanism = st.session_state.get('attention_mechanism')
+        if attention_mechanism is None:
             return False
         
-        constraints = st.session_state.attention_mechanism.get_constraints(self.node_id)
-        for constraint in constraints:
-            if constraint.startswith('code'):
-                return True
-        return False
+        constraints = attention_mechanism.get_constraints(self.node_id)
+        return any(constraint.startswith('code') for constraint in constraints)
     
     def process_llm_output(self, llm_output: str) -> None:
         """Processes the raw LLM output, extracting subtasks or results."""
@@ -145,8 +227,7 @@ Code requirements:
             if code_files:
                 self.store_in_memory("code_files", code_files)
             
-            # Try to parse JSON from the output
-            parsed_output = extract_json_from_text(llm_output)
+            parsed_output = self._parse_json(llm_output)
             
             if parsed_output:
                 # Handle subtasks in the output
@@ -159,20 +240,16 @@ Code requirements:
                             # Subtask with description
                             self._create_child_node(subtask["task_description"])
                     
-                    # Check for code in the JSON
-                    self._extract_code_from_json(parsed_output)
-                    
                 # Handle result in the output
                 elif "result" in parsed_output:
                     self.store_in_memory("result", parsed_output["result"])
-                    # Check for code in the result
-                    self._extract_code_from_json(parsed_output)
                 # Handle other parsed output
                 else:
                     # Store the entire parsed output if no specific keys are found
                     self.store_in_memory("result", parsed_output)
-                    # Check for code in the JSON
-                    self._extract_code_from_json(parsed_output)
+                
+                # Check for code anywhere in the JSON
+                self._extract_code_from_json(parsed_output)
             else:
                 # If no JSON found, check if we already found code blocks
                 if not code_files:
@@ -183,6 +260,24 @@ Code requirements:
             self.status = STATUS_FAILED
             self.error_message = f"Error processing LLM output: {str(e)}"
         
+    def _parse_json(self, text: str) -> Any:
+        """Parse JSON from text, reusing the result for the text parsed last."""
+        cached = self._parsed_output
+        if cached is not None and cached[0] == text:
+            return cached[1]
+        # Without a bracket there can be no object or array, so skip the
+        # extraction entirely
+        if '{' in text or '[' in text:
+            parsed = extract_json_from_text(text)
+        else:
+            parsed = None
+        self._parsed_output = (text, parsed)
+        return parsed
+    
+    def parsed_output(self) -> Any:
+        """JSON parsed from this node's output, or None/{} if there is none."""
+        return self._parse_json(self.output or "")
+    
     def _extract_code_from_json(self, json_data: Dict[str, Any]) -> None:
         """Extract code from JSON fields and store as code files."""
         if not json_data:
@@ -190,32 +285,26 @@ Code requirements:
             
         code_files = {}
         
-        # Look for code fields in any part of the JSON structure
-        def search_for_code(obj, prefix=""):
-            if isinstance(obj, dict):
-                for key, value in obj.items():
+        # Depth-first walk over the JSON structure with an explicit stack.
+        # Entries are (key, value, path parts); key is None for list items
+        # and the root. Children are pushed in reverse so they are visited
+        # in their original order, and the path is only joined on a hit.
+        stack = [(None, json_data, ())]
+        while stack:
+            key, value, parts = stack.pop()
+            if key is not None:
+                if isinstance(value, str):
                     key_lower = key.lower()
-                    # Check if this is a code field
-                    if isinstance(value, str) and ('code' in key_lower or 'implementation' in key_lower or key_lower.endswith('_py') or key_lower.endswith('_js')):
-                        # Generate a filename based on the key
-                        ext = 'py' if 'python' in key_lower or key_lower.endswith('_py') else 'js'
-                        if 'html' in key_lower:
-                            ext = 'html'
-                        elif 'css' in key_lower:
-                            ext = 'css'
-                        filename = f"{key.lower().replace('_code', '').replace('code_', '')}.{ext}"
-                        if prefix:
-                            filename = f"{prefix}_{filename}"
-                        code_files[filename] = value
-                    elif isinstance(value, (dict, list)):
-                        new_prefix = f"{prefix}_{key}" if prefix else key
-                        search_for_code(value, new_prefix)
-            elif isinstance(obj, list):
-                for i, item in enumerate(obj):
-                    search_for_code(item, f"{prefix}_{i}" if prefix else str(i))
-        
-        # Start recursive search
-        search_for_code(json_data)
+                    ext = _code_field_ext(key_lower)
+                    if ext:
+                        stem = key_lower.replace('_code', '').replace('code_', '')
+                        code_files["_".join(parts + (stem,)) + "." + ext] = value
+                    continue
+                parts += (key,)
+            if isinstance(value, dict):
+                stack.extend((k, v, parts) for k, v in reversed(value.items()))
+            elif isinstance(value, list):
+                stack.extend((None, item, parts + (str(i),)) for i, item in reversed(list(enumerate(value))))
         
         # Store found code files
         if code_files:
@@ -225,19 +314,23 @@ Code requirements:
 
     def extract_code_files(self) -> Dict[str, str]:
         """Extract code files from the output if present."""
-        result = {}
-        
-        # Pattern 1: Properly formatted code blocks with filepath comments
-        pattern1 = r'```(?:python|javascript|html|css)\n# filepath: (.*?)\n(.*?)```'
-        matches1 = re.findall(pattern1, self.output, re.DOTALL)
-        for filepath, content in matches1:
-            result[filepath] = content.strip()
+        # The output rarely changes once a node has run, so reuse the last
+        # scan while it is the same string
+        cache = self._code_blocks_cache
+        if cache is None or cache[0] != self.output:
+            blocks = {}
+            # Outputs without a fence (e.g. JSON-only decompositions) need no regex scan
+            if '```' in self.output:
+                # One pass over the code blocks: blocks with a filepath comment are
+                # stored under that path, the rest get a numbered name
+                for i, match in enumerate(_CODE_BLOCK_RE.finditer(self.output)):
+                    filepath = match.group("path")
+                    if not filepath:
+                        filepath = f"code_block_{i}.{_CODE_BLOCK_EXT.get(match.group('lang'), 'py')}"
+                    blocks[filepath] = match.group("body").strip()
+            cache = self._code_blocks_cache = (self.output, blocks)
         
-        # Pattern 2: Code blocks without filepath comments
-        pattern2 = r'```(?:python|javascript|html|css)?\n(.*?)```'
-        matches2 = re.findall(pattern2, self.output, re.DOTALL)
-        for i, content in enumerate(matches2):
-            result[f"code_block_{i}.py"] = content.strip()
+        result = dict(cache[1])
         
         # Also check for any code in memory (e.g., extracted from JSON)
         memory_code_files = self.retrieve_from_memory("code_files")
@@ -246,7 +339,7 @@ Code requirements:
         
         # Log finding to help with debugging
         if result:
-            print(f"Found {len(result)} code files: {list(result.keys())}")
+            logger.debug("Found %d code files: %s", len(result), list(result))
         
         return result
 
@@ -263,12 +356,13 @@ Code requirements:
         
         Note: This is an internal method that delegates to the Agent method.
         """
-        if 'agent' not in st.session_state:
+        agent = st.session_state.get('agent')
+        if agent is None:
             self.error_message = "Agent not available to create child node"
             return
         
         # Create child node through the agent to ensure proper tracking
-        st.session_state.agent.create_child_node(
+        agent.create_child_node(
             parent_node=self, 
             task_description=task_description, 
             depth=self.depth + 1
@@ -1,9 +1,26 @@
 import streamlit as st
 import json
 import os
+from collections import defaultdict
 from typing import Optional, Dict, Any
 
-from components.utils import STATUS_PENDING, STATUS_RUNNING, STATUS_COMPLETED, STATUS_FAILED
+from components.utils import STATUS_PENDING, STATUS_RUNNING, STATUS_COMPLETED, STATUS_FAILED, STATUS_EMOJI, file_suffix, select_node
+
+# Code file extension to syntax-highlighting language
+_EXT_TO_LANG = {
+    'py': 'python',
+    'js': 'javascript',
+    'html': 'html',
+    'css': 'css',
+    'json': 'json',
+    'md': 'markdown'
+}
+
+# Order in which child task groups are listed
+_STATUS_DISPLAY_ORDER = tuple(
+    (status, STATUS_EMOJI[status])
+    for status in (STATUS_RUNNING, STATUS_PENDING, STATUS_COMPLETED, STATUS_FAILED)
+)
 
 def display_node_details(node_id: str):
     """Display detailed information about a selected node"""
@@ -14,12 +31,7 @@ def display_node_details(node_id: str):
     node = st.session_state.node_lookup[node_id]
     
     # Header with status indicator
-    status_emoji = {
-        STATUS_PENDING: "🔘",
-        STATUS_RUNNING: "⏳",
-        STATUS_COMPLETED: "✅",
-        STATUS_FAILED: "❌"
-    }.get(node.status, "⚪")
+    status_emoji = STATUS_EMOJI.get(node.status, "⚪")
     
     st.subheader(f"{status_emoji} {node.retrieve_from_memory('task')}")
     
@@ -29,13 +41,12 @@ def display_node_details(node_id: str):
     st.write(f"**ID:** {node.node_id}")
     
     # Show parent information if available
-    if node.parent_id and node.parent_id in st.session_state.node_lookup:
-        parent = st.session_state.node_lookup[node.parent_id]
-        parent_task = parent.retrieve_from_memory("task")
+    parent = st.session_state.node_lookup.get(node.parent_id) if node.parent_id else None
+    if parent is not None:
+        # The task is kept on the node itself; memory is only a fallback
+        parent_task = parent.task_description or parent.retrieve_from_memory("task")
         st.write(f"**Parent:** {parent_task}")
-        if st.button("Go to parent", key=f"goto_parent_{node.node_id}"):
-            st.session_state.selected_node_id = node.parent_id
-            st.experimental_rerun()
+        st.button("Go to parent", key=f"goto_parent_{node.node_id}", on_click=select_node, args=(node.parent_id,))
     
     # Actions based on node status
     st.write("### Actions")
@@ -92,15 +103,7 @@ def display_node_details(node_id: str):
                 
                 if selected_file:
                     content = code_files[selected_file]
-                    ext = os.path.splitext(selected_file)[1][1:] if '.' in selected_file else ''
-                    lang = {
-                        'py': 'python',
-                        'js': 'javascript',
-                        'html': 'html',
-                        'css': 'css',
-                        'json': 'json',
-                        'md': 'markdown'
-                    }.get(ext, 'text')
+                    lang = _EXT_TO_LANG.get(file_suffix(selected_file)[1:], 'text')
                     
                     st.code(content, language=lang)
                     
@@ -163,31 +166,19 @@ def display_node_details(node_id: str):
         st.write("### Child Tasks")
         
         # Group children by status
-        status_groups = {
-            STATUS_PENDING: [],
-            STATUS_RUNNING: [],
-            STATUS_COMPLETED: [],
-            STATUS_FAILED: []
-        }
-        
+        node_lookup = st.session_state.node_lookup
+        status_groups = defaultdict(list)
         for child_id in node.child_ids:
-            if child_id in st.session_state.node_lookup:
-                child = st.session_state.node_lookup[child_id]
+            child = node_lookup.get(child_id)
+            if child is not None:
                 status_groups[child.status].append(child)
         
         # Display groups with their status indicators
-        for status, emoji in [
-            (STATUS_RUNNING, "⏳"),
-            (STATUS_PENDING, "🔘"),
-            (STATUS_COMPLETED, "✅"),
-            (STATUS_FAILED, "❌")
-        ]:
-            nodes = status_groups[status]
+        for status, emoji in _STATUS_DISPLAY_ORDER:
+            nodes = status_groups.get(status)
             if nodes:
                 st.write(f"**{emoji} {status.capitalize()} ({len(nodes)}):**")
                 
                 for child in nodes:
                     task = child.retrieve_from_memory("task")
-                    if st.button(f"{task}", key=f"child_{child.node_id}"):
-                        st.session_state.selected_node_id = child.node_id
-                        st.experimental_rerun()
+                    st.button(f"{task}", key=f"child_{child.node_id}", on_click=select_node, args=(child.node_id,))
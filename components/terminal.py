@@ -5,43 +5,310 @@ import subprocess
 import tempfile
 from pathlib import Path
 import shlex
+import asyncio
+import locale
+import json
+import codecs
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+# Seconds before a terminal command is killed
+COMMAND_TIMEOUT = 15
+PIP_COMMAND_TIMEOUT = 30  # pip commands may take longer
+
+# Number of command outputs kept in the terminal history
+TERMINAL_HISTORY_SIZE = 200
+# Bytes kept from each of a command's stdout and stderr; the rest is dropped
+MAX_COMMAND_OUTPUT = 1024 * 1024
+# Bytes read from a pipe at a time while streaming command output
+_READ_CHUNK_SIZE = 4096
+# Characters of a running command's output shown live, and how often it is redrawn
+LIVE_OUTPUT_TAIL = 5000
+LIVE_OUTPUT_INTERVAL = 0.2
+
+
+async def _read_stream(stream, encoding, on_output=None):
+    """Read a pipe to EOF, passing each decoded chunk to on_output as it arrives.
+
+    Only the first MAX_COMMAND_OUTPUT bytes are kept; the pipe is still
+    drained so the process never blocks on a full buffer.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    parts = []
+    size = 0
+    truncated = False
+    while True:
+        chunk = await stream.read(_READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        if size >= MAX_COMMAND_OUTPUT:
+            truncated = True
+            continue
+        chunk = chunk[:MAX_COMMAND_OUTPUT - size]
+        size += len(chunk)
+        text = decoder.decode(chunk)
+        parts.append(text)
+        if on_output is not None and text:
+            on_output(text)
+    parts.append(decoder.decode(b"", final=True))
+    if truncated:
+        parts.append(f"\n[output truncated after {MAX_COMMAND_OUTPUT} bytes]")
+    return "".join(parts)
+
+
+async def _communicate_async(command, cwd, env, timeout, on_output=None):
+    """Run a command and return its decoded (stdout, stderr).
+
+    command is either a shell command string or an argv list, which is
+    executed directly without a shell. Both pipes are read incrementally; if
+    on_output is given it is called with each stdout or stderr chunk as soon
+    as it is read. Raises asyncio.TimeoutError after killing the process if
+    it runs longer than timeout seconds.
+    """
+    pipes = dict(stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, cwd=cwd, env=env)
+    if isinstance(command, list):
+        process = await asyncio.create_subprocess_exec(*command, **pipes)
+    else:
+        process = await asyncio.create_subprocess_shell(command, **pipes)
+    encoding = locale.getpreferredencoding(False)
+    try:
+        stdout, stderr, _ = await asyncio.wait_for(
+            asyncio.gather(
+                _read_stream(process.stdout, encoding, on_output),
+                _read_stream(process.stderr, encoding, on_output),
+                process.wait(),
+            ),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise
+
+    return stdout, stderr
+
+
+# Responses from pip workers are single JSON lines behind this prefix, so
+# anything else a worker's children print to the pipe can be skipped
+_PIP_FRAME = "@@PIP_RESULT@@"
+
+# Runs inside each pip worker: import pip once, then serve one JSON request
+# per stdin line until stdin closes
+_PIP_WORKER_SCRIPT = f"""
+import io, json, os, sys, contextlib
+from pip._internal.cli.main import main as pip_main
+out = sys.stdout
+for line in sys.stdin:
+    request = json.loads(line)
+    stdout, stderr = io.StringIO(), io.StringIO()
+    try:
+        os.chdir(request["cwd"])
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            code = pip_main(request["argv"])
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except BaseException as e:
+        code = 1
+        stderr.write(repr(e))
+    out.write({_PIP_FRAME!r} + json.dumps({{"code": code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}}) + "\\n")
+    out.flush()
+"""
+
+# Characters that mean a pip command needs a real shell
+_SHELL_METACHARACTERS = "|&;<>()$`"
+# Anything the shell would expand or interpret; commands containing none of
+# these can be split with shlex and run without a shell
+_SHELL_SYNTAX = _SHELL_METACHARACTERS + "*?[]{}~#\n"
+
+# pip subcommands that change the environment; a worker that ran one is
+# retired so later commands see a fresh import state
+_PIP_MUTATING_COMMANDS = {"install", "uninstall", "download", "wheel", "cache", "config"}
+
+
+class _PipWorker:
+    """A warm Python process with pip already imported."""
+
+    def __init__(self, env):
+        self.process = subprocess.Popen(
+            [sys.executable, "-u", "-c", _PIP_WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            env=env
+        )
+        self.use_count = 0
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def request(self, argv, cwd, timeout):
+        """Run one pip command; returns (exit code, stdout, stderr).
+
+        Raises TimeoutError (after killing the worker) if no response arrives
+        within timeout seconds, and RuntimeError if the worker died.
+        """
+        self.use_count += 1
+        self.process.stdin.write(json.dumps({"argv": argv, "cwd": cwd}) + "\n")
+        self.process.stdin.flush()
+
+        response = []
+
+        def read_response():
+            for line in self.process.stdout:
+                if line.startswith(_PIP_FRAME):
+                    response.append(json.loads(line[len(_PIP_FRAME):]))
+                    return
+
+        reader = threading.Thread(target=read_response, daemon=True)
+        reader.start()
+        reader.join(timeout)
+        if reader.is_alive():
+            self.close()
+            raise TimeoutError
+        if not response:
+            raise RuntimeError("pip worker exited unexpectedly")
+        return response[0]["code"], response[0]["stdout"], response[0]["stderr"]
+
+    def close(self):
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+
+
+class PipWorkerPool:
+    """Keeps a few pip workers warm so pip commands skip interpreter and pip startup."""
+
+    def __init__(self, max_pool_size=2, max_uses=20):
+        self.max_pool_size = max_pool_size
+        self.max_uses = max_uses
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _acquire(self, env):
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive():
+                    return worker
+        return _PipWorker(env)
+
+    def _release(self, worker, retire):
+        if retire or worker.use_count >= self.max_uses or not worker.alive():
+            worker.close()
+            return
+        with self._lock:
+            if len(self._idle) < self.max_pool_size:
+                self._idle.append(worker)
+                return
+        worker.close()
+
+    def prewarm(self, env):
+        """Start a worker in the background if none is idle."""
+        with self._lock:
+            if self._idle:
+                return
+        worker = _PipWorker(env)
+        self._release(worker, retire=False)
+
+    def run(self, argv, cwd, env, timeout):
+        """Run pip with argv in cwd on a warm worker; returns (exit code, stdout, stderr)."""
+        worker = self._acquire(env)
+        retire = bool(argv) and argv[0] in _PIP_MUTATING_COMMANDS
+        try:
+            return worker.request(argv, cwd, timeout)
+        except BaseException:
+            retire = True
+            raise
+        finally:
+            self._release(worker, retire)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_pip_pool():
+    """Process-wide pip worker pool shared across sessions and reruns."""
+    return PipWorkerPool()
+
+
+# Side-effect-free commands whose output may be reused for a few seconds.
+# Only directory listings qualify: the cwd mtime in the cache key tracks
+# their inputs, whereas pip's output changes on installs elsewhere.
+_CACHEABLE_COMMANDS = {'ls', 'dir'}
+
+
+@st.cache_data(ttl=10, max_entries=128, show_spinner=False)
+def _cached_command_output(command, cwd, cwd_mtime_ns, _terminal):
+    """Run a read-only command; cached per (command, cwd, cwd mtime).
+
+    cwd_mtime_ns is only part of the cache key. _terminal is excluded from
+    hashing and only used to run the command on a miss.
+    """
+    return _terminal._run_shell_command(command)
+
+
+@lru_cache(maxsize=None)
+def _terminal_env(os_name, python_executable):
+    """Copy of os.environ with Python and common tool directories on PATH.
+
+    Cached per (os name, interpreter), so the copy and the directory probes
+    happen once per process. Callers must treat the result as read-only.
+    """
+    env = os.environ.copy()
+    python_dir = os.path.dirname(python_executable)
+    
+    # Add Python/common executable paths to PATH
+    if os_name == 'nt':  # Windows-specific paths
+        # Add Python installation paths
+        if python_dir not in env['PATH']:
+            env['PATH'] = f"{python_dir};{python_dir}\\Scripts;" + env['PATH']
+            
+        # Add common Windows tool locations - especially important for commands like ls, git, etc.
+        common_paths = [
+            "C:\\Program Files\\Git\\bin",
+            "C:\\Program Files\\Git\\cmd",
+            "C:\\Program Files\\Git\\usr\\bin",  # For ls, grep, etc
+            "C:\\msys64\\usr\\bin",             # MSYS2 paths
+            "C:\\msys64\\mingw64\\bin",
+            "C:\\Windows\\System32",
+            "C:\\Windows",
+        ]
+        separator = ";"
+    else:  # Unix paths
+        if python_dir not in env['PATH']:
+            env['PATH'] = f"{python_dir}:{env['PATH']}"
+            
+        common_paths = [
+            "/usr/local/bin",
+            "/usr/bin",
+            "/bin",
+            "/usr/sbin",
+            "/sbin",
+        ]
+        separator = ":"
+    
+    for path in common_paths:
+        if os.path.exists(path) and path not in env['PATH']:
+            env['PATH'] += f"{separator}{path}"
+    return env
+
 
 class Terminal:
     def __init__(self, working_directory=None):
-        self.working_directory = working_directory or os.getcwd()
-        self.history = []
+        # History and working directory live in session_state (see the
+        # properties below), so the instance itself can be shared and cached
+        if working_directory:
+            self.working_directory = working_directory
         
-        # Set environment variables for the terminal
-        self.env = os.environ.copy()
+        # Shared environment for subprocesses; built once and never mutated
+        self.env = _terminal_env(os.name, sys.executable)
         # Store the operating system
         self.windows = os.name == 'nt'
+        self.shell = True
         
-        # Add Python/common executable paths to PATH
-        if self.windows:  # Windows-specific paths
-            python_location = sys.executable
-            python_dir = os.path.dirname(python_location)
-            
-            # Add Python installation paths
-            if python_dir not in self.env['PATH']:
-                self.env['PATH'] = f"{python_dir};{python_dir}\\Scripts;" + self.env['PATH']
-                
-            # Add common Windows tool locations - especially important for commands like ls, git, etc.
-            common_paths = [
-                "C:\\Program Files\\Git\\bin",
-                "C:\\Program Files\\Git\\cmd",
-                "C:\\Program Files\\Git\\usr\\bin",  # For ls, grep, etc
-                "C:\\msys64\\usr\\bin",             # MSYS2 paths
-                "C:\\msys64\\mingw64\\bin",
-                "C:\\Windows\\System32",
-                "C:\\Windows",
-            ]
-            
-            for path in common_paths:
-                if os.path.exists(path) and path not in self.env['PATH']:
-                    self.env['PATH'] += f";{path}"
-            
-            self.shell = True
-            
+        if self.windows:
             # Common command aliases for Windows
             self.command_aliases = {
                 'ls': 'dir',
@@ -52,27 +319,47 @@ class Terminal:
                 'grep': 'findstr',
                 'pwd': 'cd'
             }
-        else:  # Unix paths
-            python_location = sys.executable
-            python_dir = os.path.dirname(python_location)
-            if python_dir not in self.env['PATH']:
-                self.env['PATH'] = f"{python_dir}:{self.env['PATH']}"
-                
-            common_paths = [
-                "/usr/local/bin",
-                "/usr/bin",
-                "/bin",
-                "/usr/sbin",
-                "/sbin",
-            ]
-            for path in common_paths:
-                if os.path.exists(path) and path not in self.env['PATH']:
-                    self.env['PATH'] += f":{path}"
-            
-            self.shell = True
+        else:
             self.command_aliases = {}  # No need for aliases on Unix
         
-    def run_command(self, command):
+        # Start a pip worker now so the first pip command finds it warm
+        try:
+            _get_pip_pool().prewarm(self.env)
+        except OSError:
+            pass
+        
+    @property
+    def history(self):
+        history = st.session_state.get('terminal_history')
+        if not isinstance(history, deque):
+            history = deque(history or (), maxlen=TERMINAL_HISTORY_SIZE)
+            st.session_state.terminal_history = history
+        return history
+    
+    @history.setter
+    def history(self, value):
+        st.session_state.terminal_history = deque(value, maxlen=TERMINAL_HISTORY_SIZE)
+    
+    @property
+    def working_directory(self):
+        return st.session_state.setdefault('terminal_cwd', os.getcwd())
+    
+    @working_directory.setter
+    def working_directory(self, value):
+        st.session_state.terminal_cwd = value
+    
+    def run_command(self, command, on_output=None):
+        """Run command and record its formatted output in the history.
+
+        on_output, if given, is called with chunks of the command's output
+        while it runs, for commands executed as a fresh process.
+        """
+        result = self._run_command(command, on_output)
+        # Entries never change once recorded, so their HTML is built only here
+        self.history.append({"raw": result, "html": _format_entry(result)})
+        return result
+    
+    def _run_command(self, command, on_output=None):
         if not command.strip():
             return "No command provided."
         
@@ -81,7 +368,7 @@ class Terminal:
         
         # Handle pip --version (note common mistake: -version instead of --version)
         if cmd_lower in ['pip -version', 'pip version', 'pip -v']:
-            return self._run_pip_command('pip --version')
+            return self._run_pip_command('pip --version', on_output)
         
         try:
             # Special commands handling
@@ -97,76 +384,125 @@ class Terminal:
             if command.strip().lower() == 'pwd':
                 return f"$ pwd\n{self.working_directory}"
                 
+            # Read-only inspection commands are served from a short-lived
+            # cache; the directory's mtime in the key drops it on any change
+            if cmd_lower in _CACHEABLE_COMMANDS:
+                cwd_mtime_ns = os.stat(self.working_directory).st_mtime_ns
+                return _cached_command_output(cmd_lower, self.working_directory, cwd_mtime_ns, self)
+                
             # Special handling for pip command to ensure we find it
             if command.strip().lower().startswith('pip '):
-                return self._run_pip_command(command)
+                return self._run_pip_command(command, on_output)
 
-            # Handle aliased commands on Windows
-            cmd_parts = command.strip().split(None, 1)
-            base_cmd = cmd_parts[0].lower()
-            
-            if self.windows and base_cmd in self.command_aliases:
-                windows_cmd = self.command_aliases[base_cmd]
-                args = cmd_parts[1] if len(cmd_parts) > 1 else ""
-                command = f"{windows_cmd} {args}"
-            
-            # Execute in the working directory
-            process = subprocess.Popen(
-                command,
-                shell=self.shell,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=self.working_directory,
-                env=self.env
-            )
-            
-            stdout, stderr = process.communicate(timeout=15)  # 15 second timeout
-            result = f"$ {command}\n"
-            if stdout:
-                result += stdout
-            if stderr:
-                result += f"\nError:\n{stderr}"
-            
-            self.history.append(result)
-            return result
+            return self._run_shell_command(command, on_output)
                 
-        except subprocess.TimeoutExpired:
-            process.kill()
-            return f"$ {command}\nCommand timed out after 15 seconds"
+        except asyncio.TimeoutError:
+            return f"$ {command}\nCommand timed out after {COMMAND_TIMEOUT} seconds"
         except Exception as e:
             return f"$ {command}\nError executing command: {str(e)}"
     
-    def _run_pip_command(self, command):
+    def _direct_argv(self, command):
+        """Split command into argv if it can run without a shell, else None.
+
+        Only used off Windows, where many everyday commands are cmd.exe
+        builtins. Commands with shell syntax or a leading VAR=value
+        assignment keep going through the shell.
+        """
+        if self.windows or any(ch in command for ch in _SHELL_SYNTAX):
+            return None
+        try:
+            argv = shlex.split(command)
+        except ValueError:  # unbalanced quotes; let the shell report it
+            return None
+        if not argv or '=' in argv[0]:
+            return None
+        return argv
+    
+    def _run_shell_command(self, command, on_output=None):
+        """Run a non-pip command, applying Windows aliases.
+
+        Simple commands are executed directly, saving the extra shell
+        process; anything else, or a program that cannot be started
+        directly (for example a shell builtin), runs through the shell.
+        """
+        cmd_parts = command.strip().split(None, 1)
+        base_cmd = cmd_parts[0].lower()
+        
+        if self.windows and base_cmd in self.command_aliases:
+            windows_cmd = self.command_aliases[base_cmd]
+            args = cmd_parts[1] if len(cmd_parts) > 1 else ""
+            command = f"{windows_cmd} {args}"
+        
+        # Execute in the working directory
+        argv = self._direct_argv(command)
+        if argv is not None:
+            try:
+                return self._execute(argv, command, COMMAND_TIMEOUT, on_output)
+            except (FileNotFoundError, PermissionError):
+                # Only a program that could not be started falls back to the
+                # shell; a timeout (also an OSError) must not run it twice
+                pass
+        return self._execute(command, command, COMMAND_TIMEOUT, on_output)
+    
+    def _run_pip_command(self, command, on_output=None):
         """Special handling for pip commands since they often have path issues"""
         # Get Python executable path
         python_exe = sys.executable
         
-        # Replace pip with python -m pip
-        pip_cmd = command.replace('pip', f'"{python_exe}" -m pip', 1)
+        # Plain pip invocations run on a warm worker; anything using shell
+        # syntax (pipes, redirects, chaining) still goes through the shell.
+        # Environment-changing commands retire their worker anyway, so when
+        # the caller wants live output they run as a streamed process instead
+        subcommand = command.split(None, 2)[1:2]
+        stream_live = on_output is not None and bool(subcommand) and subcommand[0] in _PIP_MUTATING_COMMANDS
+        if not stream_live and not any(ch in command for ch in _SHELL_METACHARACTERS):
+            try:
+                argv = shlex.split(command, posix=not self.windows)[1:]
+                code, stdout, stderr = _get_pip_pool().run(
+                    argv, self.working_directory, self.env, PIP_COMMAND_TIMEOUT
+                )
+            except TimeoutError:
+                return f"$ {command}\nCommand timed out after {PIP_COMMAND_TIMEOUT} seconds"
+            except (OSError, RuntimeError, ValueError):
+                pass  # fall back to a fresh pip process below
+            else:
+                result = f"$ {command}\n"
+                if stdout:
+                    result += stdout
+                if stderr:
+                    result += f"\nError:\n{stderr}"
+                return result
+        
+        # Replace pip with python -m pip, run directly unless it needs a shell
+        argv = self._direct_argv(command)
+        if argv is not None:
+            pip_cmd = [python_exe, "-m", "pip"] + argv[1:]
+        else:
+            pip_cmd = command.replace('pip', f'"{python_exe}" -m pip', 1)
         
         try:
-            process = subprocess.Popen(
-                pip_cmd,
-                shell=self.shell,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=self.working_directory,
-                env=self.env
-            )
-            
-            stdout, stderr = process.communicate(timeout=30)  # pip commands may take longer
-            result = f"$ {command}\n"
-            if stdout:
-                result += stdout
-            if stderr:
-                result += f"\nError:\n{stderr}"
-            
-            return result
+            return self._execute(pip_cmd, command, PIP_COMMAND_TIMEOUT, on_output)
+        except asyncio.TimeoutError:
+            return f"$ {command}\nCommand timed out after {PIP_COMMAND_TIMEOUT} seconds"
         except Exception as e:
             return f"$ {command}\nError executing pip: {str(e)}"
     
+    def _execute(self, command, display_command, timeout, on_output=None):
+        """Run command in the working directory and format its output.
+
+        The process is driven by asyncio so its stdout and stderr are read
+        concurrently on one event loop and can be streamed to on_output.
+        """
+        stdout, stderr = asyncio.run(
+            _communicate_async(command, self.working_directory, self.env, timeout, on_output)
+        )
+        result = f"$ {display_command}\n"
+        if stdout:
+            result += stdout
+        if stderr:
+            result += f"\nError:\n{stderr}"
+        return result
+    
     def _change_directory(self, path):
         """Handle cd command by changing working directory"""
         # Handle home directory alias
@@ -200,9 +536,31 @@ class Terminal:
     def get_working_directory(self):
         return self.working_directory
 
+def _format_entry(entry):
+    """Render one command's output as terminal-line HTML."""
+    first, sep, rest = entry.partition('\n')
+    first_class = "terminal-line command-line" if first.startswith('$') else "terminal-line"
+    html = f"<div class='{first_class}'>{first}</div>"
+    if sep:
+        # Every later line gets the same wrapper, so the newlines are replaced
+        # in one pass instead of building a list entry per line
+        html += "<div class='terminal-line'>" + rest.replace('\n', "</div><div class='terminal-line'>") + "</div>"
+    return html
+
+
+@st.cache_resource
+def _get_terminal():
+    """Process-wide Terminal; its per-session state is kept in session_state."""
+    return Terminal()
+
+
+# Lets the terminal panel rerun on its own, without the rest of the page,
+# on Streamlit versions that support fragments
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
 class ClineInterface:
     def __init__(self, terminal=None):
-        self.terminal = terminal or Terminal()
+        self.terminal = terminal or _get_terminal()
         self.initialize_terminal()
         
     def initialize_terminal(self):
@@ -210,6 +568,42 @@ class ClineInterface:
         if 'explorer_dir' in st.session_state and os.path.isdir(st.session_state.explorer_dir):
             self.terminal.set_working_directory(st.session_state.explorer_dir)
         
+    def _live_output(self, command):
+        """Return an on_output callback that shows the tail of the output so far."""
+        placeholder = st.empty()
+        state = {"text": f"$ {command}\n", "shown_at": 0.0}
+        
+        def on_output(text):
+            state["text"] = (state["text"] + text)[-LIVE_OUTPUT_TAIL:]
+            # Redraw at most every LIVE_OUTPUT_INTERVAL seconds
+            now = time.monotonic()
+            if now - state["shown_at"] >= LIVE_OUTPUT_INTERVAL:
+                state["shown_at"] = now
+                placeholder.code(state["text"], language=None)
+        
+        return on_output
+        
+    def _history_html(self, history):
+        """Terminal output markup for history, newest entry first.
+        
+        Joining up to TERMINAL_HISTORY_SIZE entries is O(total output), so the
+        result is kept in session state and rebuilt only after the history
+        changes: it is only ever appended to or replaced, so the deque object,
+        its length and its newest entry identify its contents.
+        """
+        cached = st.session_state.get('terminal_history_html')
+        newest = history[-1]
+        if cached and cached[0] is history and cached[1] == len(history) and cached[2] is newest:
+            return cached[3]
+        html = (
+            "<div class='terminal-output'>"
+            + "".join(entry["html"] for entry in reversed(history))
+            + "</div>"
+        )
+        st.session_state.terminal_history_html = (history, len(history), newest, html)
+        return html
+        
+    @_fragment
     def display(self):
         # Show current directory
         st.write(f"📂 **Current directory:** `{self.terminal.get_working_directory()}`")
@@ -257,12 +651,9 @@ class ClineInterface:
         # Now check if the button was clicked and handle command execution
         if st.session_state.run_cmd_clicked and st.session_state.current_cmd_input:
             command = st.session_state.current_cmd_input
-            output = self.terminal.run_command(command)
-            
-            # Add to history
-            if "terminal_history" not in st.session_state:
-                st.session_state.terminal_history = []
-            st.session_state.terminal_history.append(output)
+            # Show output in place while the command runs; run_command records
+            # the final output in the terminal history
+            self.terminal.run_command(command, self._live_output(command))
             
             # Reset the flag and command input for the next run
             st.session_state.run_cmd_clicked = False
@@ -275,7 +666,7 @@ class ClineInterface:
         control_col1, control_col2, control_col3 = st.columns([1, 1, 4])
         with control_col1:
             if st.button("Clear", key="clear_terminal"):
-                st.session_state.terminal_history = []
+                self.terminal.history = []
                 st.rerun()
         
         with control_col2:
@@ -286,7 +677,8 @@ class ClineInterface:
                     st.rerun()
         
         # Display history in reverse chronological order (newest at top like VS Code)
-        if "terminal_history" in st.session_state and st.session_state.terminal_history:
+        history = self.terminal.history
+        if history:
             # Use a scrollable container with fixed height for terminal output
             st.markdown("""
             <style>
@@ -314,14 +706,4 @@ class ClineInterface:
             """, unsafe_allow_html=True)
             
             # Terminal output
-            output_html = "<div class='terminal-output'>"
-            for entry in reversed(st.session_state.terminal_history):
-                lines = entry.split('\n')
-                for i, line in enumerate(lines):
-                    if i == 0 and line.startswith('$'):  # Command line
-                        output_html += f"<div class='terminal-line command-line'>{line}</div>"
-                    else:
-                        output_html += f"<div class='terminal-line'>{line}</div>"
-            output_html += "</div>"
-            
-            st.markdown(output_html, unsafe_allow_html=True)
+            st.markdown(self._history_html(history), unsafe_allow_html=True)
@@ -1,12 +1,24 @@
 import streamlit as st
-import networkx as nx
-import matplotlib.pyplot as plt
-from typing import Dict, Any, Optional
-import io
+from typing import Dict, Any, NamedTuple, Optional, Tuple
+from collections import defaultdict
 
-from components.utils import STATUS_PENDING, STATUS_RUNNING, STATUS_COMPLETED, STATUS_FAILED
+from components.utils import STATUS_PENDING, STATUS_RUNNING, STATUS_COMPLETED, STATUS_FAILED, STATUS_EMOJI, select_node
 import uuid
 
+def _node_task(node_id: str, node: Any) -> str:
+    """Display text for a node's task.
+
+    The task_description slot is read first: it is a plain attribute read,
+    whereas memory is only consulted for nodes (such as loaded ones) whose
+    task lives there alone.
+    """
+    return node.task_description or node.retrieve_from_memory("task") or f"Node {node_id[:8]}..."
+
+def _set_expanded(expanded_nodes: Dict[str, bool], node_id: str, expanded: bool) -> None:
+    """on_click callback for a node's expand/collapse toggle."""
+    expanded_nodes[node_id] = expanded
+    st.session_state.expanded_nodes = expanded_nodes
+
 def render_node_tree(root_node_id: str, expanded_nodes: Optional[Dict[str, bool]] = None):
     """Renders the task tree hierarchically using components in the UI."""
     if expanded_nodes is None:
@@ -16,30 +28,31 @@ def render_node_tree(root_node_id: str, expanded_nodes: Optional[Dict[str, bool]
         st.warning("Root node not found.")
         return
         
-    # Function to render node and its children recursively
-    def render_node(node_id: str, depth: int = 0):
-        if node_id not in st.session_state.node_lookup:
-            return
-            
-        node = st.session_state.node_lookup[node_id]
-        task_description = node.retrieve_from_memory("task") or f"Node {node_id[:8]}..."
-        
-        # Status indicator
-        status_indicator = {
-            STATUS_PENDING: "🔘",
-            STATUS_RUNNING: "⏳",
-            STATUS_COMPLETED: "✅",
-            STATUS_FAILED: "❌"
-        }.get(node.status, "⚪")
+    node_lookup = st.session_state.node_lookup
+    
+    # Flatten the visible part of the tree with an iterative DFS, skipping the
+    # children of collapsed nodes so they never instantiate any widgets
+    visible = []
+    stack = [(root_node_id, 0)]
+    while stack:
+        node_id, depth = stack.pop()
+        node = node_lookup.get(node_id)
+        if node is None:
+            continue
         
-        # Indentation for tree structure
-        indent = "  " * depth
+        # Auto-expand first level
+        is_expanded = expanded_nodes.get(node_id, depth < 1)
+        visible.append((node_id, depth, is_expanded))
         
-        # Create a unique key for this node
-        node_key = f"node_{node_id}"
+        if is_expanded and node.child_ids:
+            stack.extend((child_id, depth + 1) for child_id in reversed(node.child_ids))
+    
+    for node_id, depth, is_expanded in visible:
+        node = node_lookup[node_id]
+        task_description = _node_task(node_id, node)
         
-        # Create expandable section for the node
-        is_expanded = expanded_nodes.get(node_id, depth < 1)  # Auto-expand first level
+        # Status indicator
+        status_indicator = STATUS_EMOJI.get(node.status, "⚪")
         
         # Node header with expansion toggle and status
         col1, col2, col3 = st.columns([0.7, 8, 1.3])
@@ -49,101 +62,75 @@ def render_node_tree(root_node_id: str, expanded_nodes: Optional[Dict[str, bool]
             
         with col2:
             if node.child_ids:
-                if st.button("📂" if is_expanded else "📁", key=f"expand_{node_id}", help="Expand/Collapse"):
-                    expanded_nodes[node_id] = not is_expanded
-                    st.session_state.expanded_nodes = expanded_nodes
-                    st.experimental_rerun()
+                st.button("📂" if is_expanded else "📁", key=f"expand_{node_id}", help="Expand/Collapse",
+                          on_click=_set_expanded, args=(expanded_nodes, node_id, not is_expanded))
             else:
                 st.write("📄")
                 
             st.write(f"{task_description}")
             
         with col3:
-            if st.button("Select", key=f"select_{node_id}"):
-                st.session_state.selected_node_id = node_id
-                st.experimental_rerun()
-        
-        # If expanded and has children, show them
-        if is_expanded and node.child_ids:
-            for child_id in node.child_ids:
-                render_node(child_id, depth + 1)
+            st.button("Select", key=f"select_{node_id}", on_click=select_node, args=(node_id,))
+
+class NodeSnapshot(NamedTuple):
+    """Parallel per-node lists of the task tree; index i describes one node."""
+    ids: Tuple[str, ...]
+    parents: Tuple[Optional[str], ...]
+    statuses: Tuple[str, ...]
+    tasks: Tuple[str, ...]
+    depths: Tuple[int, ...]
+
+def _snapshot_nodes(node_lookup: Dict[str, Any]) -> NodeSnapshot:
+    """Reads every field the graph view needs in one pass over node_lookup."""
+    ids, parents, statuses, tasks, depths = [], [], [], [], []
+    for node_id, node in node_lookup.items():
+        ids.append(node_id)
+        parents.append(node.parent_id)
+        statuses.append(node.status)
+        tasks.append(_node_task(node_id, node))
+        depths.append(node.depth)
+    return NodeSnapshot(tuple(ids), tuple(parents), tuple(statuses), tuple(tasks), tuple(depths))
+
+# Fill colors for graph nodes by status
+_STATUS_FILL = {
+    STATUS_PENDING: "lightgray",
+    STATUS_RUNNING: "yellow",
+    STATUS_COMPLETED: "lightgreen",
+    STATUS_FAILED: "lightcoral"
+}
+
+def _build_graph_dot(ids: tuple, parents: tuple, statuses: tuple, labels: tuple) -> str:
+    """Builds a Graphviz DOT description of the task graph from parallel node lists."""
+    lines = [
+        "digraph {",
+        '  node [shape=ellipse, style=filled, fontsize=8];',
+    ]
+    for node_id, label, status in zip(ids, labels, statuses):
+        label = label.replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'  "{node_id}" [label="{label}", fillcolor="{_STATUS_FILL.get(status, "white")}"];')
     
-    # Start rendering from the root
-    render_node(root_node_id)
+    # Add an edge from each parent to its child
+    known_ids = set(ids)
+    for parent_id, node_id in zip(parents, ids):
+        if parent_id and parent_id in known_ids:
+            lines.append(f'  "{parent_id}" -> "{node_id}";')
+    lines.append("}")
+    return "\n".join(lines)
 
 def render_node_graph(root_node_id: str):
     """Renders the task tree as a network graph."""
     if root_node_id not in st.session_state.node_lookup:
         st.warning("Root node not found.")
         return
-        
-    # Create graph
-    G = nx.DiGraph()
-    
-    # Add nodes and edges
-    for node_id, node in st.session_state.node_lookup.items():
-        # Get task description as node label
-        label = node.retrieve_from_memory("task") or f"Node {node_id[:8]}..."
-        if len(label) > 20:
-            label = label[:17] + "..."
-            
-        # Add node with attributes
-        G.add_node(node_id, 
-                  label=label,
-                  status=node.status)
-        
-        # Add edge from parent to this node
-        if node.parent_id and node.parent_id in st.session_state.node_lookup:
-            G.add_edge(node.parent_id, node_id)
-    
-    # Create the plot
-    plt.figure(figsize=(10, 6))
-    
-    # Get hierarchical layout
-    try:
-        pos = nx.nx_agraph.graphviz_layout(G, prog="dot")
-    except ImportError:
-        # Fallback if graphviz is not available
-        pos = nx.spring_layout(G)
-    
-    # Node colors based on status
-    node_colors = []
-    for node in G.nodes():
-        status = G.nodes[node]["status"]
-        color = {
-            STATUS_PENDING: "lightgray",
-            STATUS_RUNNING: "yellow",
-            STATUS_COMPLETED: "lightgreen",
-            STATUS_FAILED: "lightcoral"
-        }.get(status, "white")
-        node_colors.append(color)
-    
-    # Draw nodes
-    nx.draw_networkx_nodes(G, pos, 
-                          node_size=1500, 
-                          node_color=node_colors,
-                          edgecolors="black")
-    
-    # Draw edges
-    nx.draw_networkx_edges(G, pos, 
-                          arrows=True,
-                          arrowsize=20,
-                          width=1.5)
     
-    # Draw labels
-    nx.draw_networkx_labels(G, pos, 
-                           labels={n: G.nodes[n]["label"] for n in G.nodes()},
-                           font_size=8)
+    snapshot = _snapshot_nodes(st.session_state.node_lookup)
     
-    # Save to buffer and display in Streamlit
-    plt.axis('off')
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-    buf.seek(0)
+    # Node labels for the graph
+    labels = tuple(task if len(task) <= 20 else task[:17] + "..." for task in snapshot.tasks)
     
-    # Display image
-    st.image(buf, use_column_width=True)
-    plt.close()
+    # Rendered client-side by the browser, so there is no server-side rasterization
+    st.graphviz_chart(_build_graph_dot(snapshot.ids, snapshot.parents, snapshot.statuses, labels),
+                      use_container_width=True)
     
     # Create clickable buttons for nodes
     st.write("**Click on a node to select it:**")
@@ -152,35 +139,23 @@ def render_node_graph(root_node_id: str):
     i = 0
     
     # Sort nodes by depth for better display
-    nodes_by_depth = {}
-    for node_id in G.nodes():
-        node = st.session_state.node_lookup[node_id]
-        depth = node.depth
-        if depth not in nodes_by_depth:
-            nodes_by_depth[depth] = []
-        nodes_by_depth[depth].append(node_id)
+    nodes_by_depth = defaultdict(list)
+    for index, depth in enumerate(snapshot.depths):
+        nodes_by_depth[depth].append(index)
     
     # Display nodes by depth
     for depth in sorted(nodes_by_depth.keys()):
         st.write(f"**Level {depth}:**")
         
-        for node_id in nodes_by_depth[depth]:
-            node = st.session_state.node_lookup[node_id]
-            task = node.retrieve_from_memory("task") or f"Node {node_id[:8]}..."
+        for index in nodes_by_depth[depth]:
+            node_id = snapshot.ids[index]
+            task = snapshot.tasks[index]
             if len(task) > 25:
                 task = task[:22] + "..."
                 
-            status_icon = {
-                STATUS_PENDING: "🔘",
-                STATUS_RUNNING: "⏳",
-                STATUS_COMPLETED: "✅",
-                STATUS_FAILED: "❌"
-            }.get(node.status, "⚪")
+            status_icon = STATUS_EMOJI.get(snapshot.statuses[index], "⚪")
             
             with cols[i % 3]:
-                if st.button(f"{status_icon} {task}", key=f"graph_node_{node_id}"):
-                    st.session_state.selected_node_id = node_id
-                    st.experimental_rerun()
+                st.button(f"{status_icon} {task}", key=f"graph_node_{node_id}", on_click=select_node, args=(node_id,))
             
             i += 1
-``` 
@@ -1,43 +1,173 @@
 import streamlit as st
-import google.generativeai as genai
 import re
 import json
 import time
+import hashlib
+import random
+import logging
+import os
+import shutil
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; fall back to the stdlib json module
+    orjson = None
 from typing import Optional, Dict, List, Any, Union, Tuple
 
+logger = logging.getLogger(__name__)
+
 # --- Constants ---
 MAX_RETRIES = 3
-RETRY_DELAY = 2
+RETRY_DELAY = 2  # base delay in seconds, doubled on each retry
+RETRY_MAX_DELAY = 30
 MAX_DEPTH = 5
 GLOBAL_CONTEXT_SUMMARY_INTERVAL = 10
+RESPONSE_CACHE_SIZE = 256  # LLM responses kept per agent, keyed by prompt
 STATUS_PENDING = "pending"
 STATUS_RUNNING = "running"
 STATUS_COMPLETED = "completed"
 STATUS_FAILED = "failed"
 STATUS_OVERRIDDEN = "overridden"  # Added from agent/constants.py
+STATUS_EMOJI = {
+    STATUS_PENDING: "🔘",
+    STATUS_RUNNING: "⏳",
+    STATUS_COMPLETED: "✅",
+    STATUS_FAILED: "❌"
+}
+
+@lru_cache(maxsize=1024)
+def file_suffix(path: str) -> str:
+    """Return the lowercased extension of path, including the dot ('' if none)."""
+    return os.path.splitext(path)[1].lower()
+
+def atomic_write(filename: str, payload: bytes, fsync: bool = False) -> None:
+    """Replace filename with payload via a uniquely named sibling temp file.
+
+    The temp file is opened with mode 0o666 so the kernel applies the umask to
+    new files; an existing target keeps its permission bits. Set fsync to
+    flush the data to disk before the rename.
+    """
+    directory, name = os.path.split(os.path.abspath(filename))
+    while True:
+        tmp_filename = os.path.join(directory, f".{name}.{os.urandom(4).hex()}.tmp")
+        try:
+            fd = os.open(tmp_filename, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0), 0o666)
+        except FileExistsError:
+            continue
+        break
+    try:
+        with open(fd, "wb", buffering=65536) as f:
+            f.write(payload)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        if os.path.exists(filename):
+            shutil.copymode(filename, tmp_filename)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+
+@lru_cache(maxsize=None)
+def _genai():
+    """The google.generativeai module, imported on first use.
+
+    It takes the better part of a second to import, and the parsing helpers
+    in this module do not need it.
+    """
+    import google.generativeai as genai
+    return genai
+
+def _api_key_id(api_key: str) -> str:
+    """Short, non-reversible identifier for an API key, used in cache keys."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+# Identifier of the API key genai is currently configured with in this process
+_configured_key_id = None
+
+def _configure_gemini(api_key: str) -> None:
+    """Configure genai for api_key, skipping the call if it is already in effect.
+    
+    initialize_gemini_api runs on every rerun; reconfiguring with the same key
+    would only throw away genai's clients and rebuild them.
+    """
+    global _configured_key_id
+    key_id = _api_key_id(api_key)
+    if key_id != _configured_key_id:
+        _genai().configure(api_key=api_key)
+        _configured_key_id = key_id
+    st.session_state.gemini_key_id = key_id
 
 def initialize_gemini_api():
     api_key = st.secrets.get("GOOGLE_API_KEY", None)
     if (api_key):
-        genai.configure(api_key=api_key)
+        _configure_gemini(api_key)
         return True
     else:
         st.error("Google API Key not found in secrets. Please configure it.")
         api_key = st.text_input("Enter Google API Key:", type="password")
         if (api_key):
-            genai.configure(api_key=api_key)
+            _configure_gemini(api_key)
             return True
     return False
 
+@st.cache_resource(show_spinner=False)
+def _list_model_names(key_id: str) -> Tuple[str, ...]:
+    """Names of models supporting generateContent; listed once per API key."""
+    return tuple(m.name for m in _genai().list_models() if 'generateContent' in m.supported_generation_methods)
+
+@st.cache_resource(show_spinner=False)
+def _get_model_cached(model_name: str, key_id: str):
+    """GenerativeModel client for model_name, shared across reruns and sessions."""
+    return _genai().GenerativeModel(model_name)
+
 def get_model():
-    models = [m for m in genai.list_models() if 'generateContent' in m.supported_generation_methods]
-    if not models:
+    key_id = st.session_state.get('gemini_key_id', "")
+    if not _list_model_names(key_id):
         st.error("No suitable models found. Check your API key.")
         return None
     
     selected_model = st.session_state.get('selected_model', "gemini-2.0-pro-exp-02-05")
-    model = genai.GenerativeModel(selected_model)
-    return model
+    return _get_model_cached(selected_model, key_id)
+
+def select_node(node_id: Optional[str]) -> None:
+    """on_click callback that makes node_id the selected node.
+    
+    Callbacks run before the rerun a click triggers, so the selection is
+    already in place and no second st.rerun() pass is needed.
+    """
+    st.session_state.selected_node_id = node_id
+
+@lru_cache(maxsize=None)
+def _api_error_types() -> Tuple[tuple, type]:
+    """(retryable API error types, base API error type), imported on first use.
+    
+    Transient failures are worth retrying; any other API error (bad key,
+    invalid request, permission denied) fails immediately. google.api_core
+    is only needed once an error has actually been raised.
+    """
+    from google.api_core import exceptions as google_exceptions
+    retryable = (
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.TooManyRequests,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+    )
+    return retryable, google_exceptions.GoogleAPICallError
+
+def is_retryable_error(error: Exception) -> bool:
+    """Whether error may succeed on retry; only non-transient API errors are permanent."""
+    retryable, api_error = _api_error_types()
+    if isinstance(error, retryable):
+        return True
+    return not isinstance(error, api_error)
+
+def retry_delay(attempt: int) -> float:
+    """Truncated exponential backoff with jitter for the given 0-based attempt."""
+    return min(RETRY_MAX_DELAY, RETRY_DELAY * 2 ** attempt) * random.uniform(0.5, 1.5)
 
 def handle_retryable_error(func, *args, **kwargs):
     retries = 0
@@ -46,10 +176,11 @@ def handle_retryable_error(func, *args, **kwargs):
             return func(*args, **kwargs)
         except Exception as e:
             retries += 1
-            if retries >= MAX_RETRIES:
+            if retries >= MAX_RETRIES or not is_retryable_error(e):
                 raise
-            print(f"Error: {e}. Retrying in {RETRY_DELAY}s...")
-            time.sleep(RETRY_DELAY)
+            delay = retry_delay(retries - 1)
+            logger.warning("Error: %s. Retrying in %.1fs...", e, delay)
+            time.sleep(delay)
     raise RuntimeError("Unexpected error in handle_retryable_error")
 
 def parse_constraint(constraint: str) -> Dict[str, str]:
@@ -59,55 +190,133 @@ def parse_constraint(constraint: str) -> Dict[str, str]:
         return {"type": constraint_type.strip(), "value": value.strip()}
     return {"type": constraint, "value": ""}
 
+def _json_loads(text: str) -> Any:
+    """Parse JSON text with orjson when available.
+    
+    Both parsers raise a json.JSONDecodeError subclass on invalid input.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+# Patterns used by extract_json_from_text, compiled once at import
+_JSON_BLOCK_RE = re.compile(r'```(?:json)?\s*([\s\S]*?)```', re.DOTALL)
+_FENCE_LINE_RE = re.compile(r'^\s*```.*$', re.MULTILINE)
+
+_JSON_TOKEN_RE = re.compile(r'["{}]')
+
+def _scan_json(text: str) -> Optional[str]:
+    """Return the first balanced {...} span in text, or None.
+    
+    Only objects are looked for: callers expect a dict, and an array in the
+    surrounding prose must not win over the object that follows it.
+    Jumps between quotes and braces instead of visiting every character;
+    braces inside string literals (including escaped quotes) are ignored.
+    The slice is not validated, that is left to the JSON parser.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+    depth = 0
+    pos = start
+    while True:
+        match = _JSON_TOKEN_RE.search(text, pos)
+        if not match:
+            return None
+        char, i = match.group(), match.start()
+        if char == '"':
+            # Skip to the closing quote, stepping over escaped ones
+            end = i + 1
+            while True:
+                end = text.find('"', end)
+                if end == -1:
+                    return None
+                backslashes = 0
+                while text[end - 1 - backslashes] == '\\':
+                    backslashes += 1
+                if backslashes % 2 == 0:
+                    break
+                end += 1
+            pos = end + 1
+            continue
+        depth += 1 if char == '{' else -1
+        if depth == 0:
+            return text[start:i + 1]
+        pos = i + 1
+
+_DECODER = json.JSONDecoder()
+
+def _decode_first_object(text: str) -> Any:
+    """Decode the first JSON object that parses, starting at each '{' in turn.
+    
+    raw_decode stops at the end of the value, so trailing text after it is
+    ignored. Raises json.JSONDecodeError if no '{' starts a valid object.
+    """
+    start = text.find('{')
+    while start != -1:
+        try:
+            return _DECODER.raw_decode(text, start)[0]
+        except json.JSONDecodeError:
+            start = text.find('{', start + 1)
+    raise json.JSONDecodeError("No JSON object found", text, 0)
+
 def extract_json_from_text(text: str) -> Dict[str, Any]:
     """Extract JSON content from text."""
-    json_pattern = r'```(?:json)?\s*([\s\S]*?)```'
-    matches = re.findall(json_pattern, text, re.DOTALL)
+    matches = _JSON_BLOCK_RE.findall(text)
     
     if matches:
         # Try each match until we find valid JSON
         for match in matches:
             try:
-                return json.loads(match)
+                return _json_loads(match)
             except json.JSONDecodeError:
                 continue
     
-    # If no JSON in code blocks, try to parse the whole text
+    # Otherwise take the first balanced object in the text
+    candidate = _scan_json(text)
+    if candidate:
+        try:
+            return _json_loads(candidate)
+        except json.JSONDecodeError:
+            pass
+    
+    # Fall back to parsing the whole text
     try:
         # Clean up the text - remove markdown formatting if present
-        clean_text = re.sub(r'^\s*```.*$', '', text, flags=re.MULTILINE)
-        clean_text = re.sub(r'^\s*```\s*$', '', clean_text, flags=re.MULTILINE)
+        # (this also covers bare closing fences)
+        clean_text = _FENCE_LINE_RE.sub('', text)
         
-        return json.loads(clean_text)
+        return _json_loads(clean_text)
     except json.JSONDecodeError:
         # Look for JSON-like structure without code blocks
         try:
-            start_idx = text.find('{')
-            end_idx = text.rfind('}') + 1
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = text[start_idx:end_idx]
-                return json.loads(json_str)
-        except (json.JSONDecodeError, ValueError):
+            return _decode_first_object(text)
+        except json.JSONDecodeError:
             pass
     
     return {}
 
 def handle_node_retryable_error(node: Any, attempt: int, error: Exception) -> bool:
     """Handle retryable errors during node execution."""
+    if not is_retryable_error(error):
+        node.status = STATUS_FAILED
+        node.error_message = f"Non-retryable error: {str(error)}"
+        return True
     if attempt < MAX_RETRIES - 1:
         node.error_message = f"Error (attempt {attempt + 1}): {str(error)}. Retrying..."
-        time.sleep(RETRY_DELAY)
+        time.sleep(retry_delay(attempt))
         return False
     else:
         node.status = STATUS_FAILED
         node.error_message = f"Max retries reached. Last error: {str(error)}"
         return True
 
+_CODE_BLOCK_RE = re.compile(r'```(\w*)\n(.*?)```', re.DOTALL)
+
 def extract_code_blocks(text: str) -> List[Dict[str, str]]:
     """Extract code blocks from text with language and content."""
     code_blocks = []
-    pattern = r'```(\w*)\n(.*?)```'
-    matches = re.findall(pattern, text, re.DOTALL)
+    matches = _CODE_BLOCK_RE.findall(text)
     
     for lang, content in matches:
         if lang.strip():
@@ -123,42 +332,79 @@ def extract_code_blocks(text: str) -> List[Dict[str, str]]:
             
     return code_blocks
 
+# Patterns used by extract_code_with_filenames, compiled once at import. They
+# are only applied to a single code block or the short text just before it.
+_FILEPATH_COMMENT_RE = re.compile(r'(?:\/\/|#)\s*filepath:\s*(.*?)\n(.*)', re.DOTALL)
+_FILEPATH_HEADER_RE = re.compile(r'[Ff]ile(?:path)?:[ \t]*[`"\']?([^\n]*?)[`"\']?\n\s*$')
+_FILENAME_HINT_RE = re.compile(r'(?:file|filename|path):\s*[`"\']?([\w\/\.-]+)[`"\']?', re.IGNORECASE)
+_LANG_TAG_RE = re.compile(r'\w*')
+# How far back before a code block to look for a "File: path" header
+_FILEPATH_HEADER_WINDOW = 200
+
+def _iter_code_blocks(text: str):
+    """Yield (start, end, lang, code) for each fenced code block in one forward scan.
+
+    start is the offset of the opening fence and end the offset just past the
+    closing one. An opening fence must be followed by an optional word-only
+    language tag and a newline; anything else is not treated as a block.
+    """
+    pos = 0
+    while True:
+        start = text.find("```", pos)
+        if start < 0:
+            return
+        newline = text.find("\n", start + 3)
+        if newline < 0:
+            return
+        lang = text[start + 3:newline]
+        if not _LANG_TAG_RE.fullmatch(lang):
+            pos = start + 3
+            continue
+        close = text.find("```", newline + 1)
+        if close < 0:
+            return
+        yield start, close + 3, lang, text[newline + 1:close]
+        pos = close + 3
+
 def extract_code_with_filenames(text: str) -> Dict[str, Dict[str, str]]:
     """
     Advanced code extraction that looks for file paths in various formats.
     Returns a dictionary mapping filepath to {language, content}.
     """
     result = {}
+    blocks = []
     
-    # Pattern 1: Code blocks with filepath comments (most common)
-    pattern1 = r'```(\w*)\n(?:\/\/|#)\s*filepath:\s*(.*?)\n(.*?)```'
-    matches1 = re.findall(pattern1, text, re.DOTALL)
-    for lang, filepath, code in matches1:
-        filepath = filepath.strip()
-        result[filepath] = {
-            "language": lang.strip() or "text",
-            "content": code.strip()
-        }
-    
-    # Pattern 2: Explicit filepath mentions followed by code blocks
-    pattern2 = r'[Ff]ile(?:path)?:\s*[`"\']?(.*?)[`"\']?\n\s*```(\w*)\n(.*?)```'
-    matches2 = re.findall(pattern2, text, re.DOTALL)
-    for filepath, lang, code in matches2:
-        filepath = filepath.strip()
-        if filepath not in result:  # Don't override if already found
-            result[filepath] = {
-                "language": lang.strip() or "text",
-                "content": code.strip()
-            }
+    prev_end = 0
+    for start, end, lang, code in _iter_code_blocks(text):
+        blocks.append((lang, code))
+        
+        # Pattern 1: Code blocks with filepath comments (most common)
+        match = _FILEPATH_COMMENT_RE.match(code)
+        if match:
+            filepath, code = match.groups()
+        else:
+            # Pattern 2: Explicit filepath mentions followed by code blocks
+            match = _FILEPATH_HEADER_RE.search(text, max(prev_end, start - _FILEPATH_HEADER_WINDOW), start)
+            filepath = match.group(1) if match else None
+        prev_end = end
+        
+        if filepath is not None:
+            filepath = filepath.strip()
+            if filepath not in result:  # Don't override if already found
+                result[filepath] = {
+                    "language": lang.strip() or "text",
+                    "content": code.strip()
+                }
     
     # Pattern 3: Code blocks with likely filenames in headers or comments
     if not result:
-        code_blocks = re.findall(r'```(\w+)\n(.*?)```', text, re.DOTALL)
-        for lang, code in code_blocks:
+        for lang, code in blocks:
+            if not lang:
+                continue
             # Look for filename patterns in the first few lines
-            first_lines = code.split("\n")[:3]
+            first_lines = code.split("\n", 3)[:3]
             for line in first_lines:
-                file_match = re.search(r'(?:file|filename|path):\s*[`"\']?([\w\/\.-]+)[`"\']?', line, re.IGNORECASE)
+                file_match = _FILENAME_HINT_RE.search(line)
                 if file_match:
                     filepath = file_match.group(1).strip()
                     if filepath not in result:
@@ -194,8 +440,7 @@ def extract_code_with_filenames(text: str) -> Dict[str, Dict[str, str]]:
         }
         
         file_counter = {}  # Keep track of how many files per language
-        code_blocks = re.findall(r'```(\w+)\n(.*?)```', text, re.DOTALL)
-        for lang, code in code_blocks:
+        for lang, code in blocks:
             if lang:
                 lang_lower = lang.lower()
                 ext = lang_to_ext.get(lang_lower, lang_lower)
@@ -230,21 +475,28 @@ def extract_code_with_filenames(text: str) -> Dict[str, Dict[str, str]]:
 
 def parse_response(text: str):
     try:
-        start_idx = text.find('{')
-        end_idx = text.rfind('}')
-        if start_idx >= 0 and end_idx > start_idx:
-            json_str = text[start_idx:end_idx+1]
-            return json.loads(json_str)
+        return _decode_first_object(text)
     except json.JSONDecodeError:
-        pass
-    return text
+        return text
+
+_PRIMITIVE_TYPES = frozenset((str, int, float, bool, type(None)))
 
 def safe_serialize(obj):
+    """Convert obj into JSON-serializable types.
+    
+    Dicts with only string keys and primitive values, and lists of only
+    primitives, are returned as-is rather than copied; treat the result as
+    read-only.
+    """
     if isinstance(obj, (str, int, float, bool, type(None))):
         return obj
     elif isinstance(obj, (list, tuple)):
+        if all(type(item) in _PRIMITIVE_TYPES for item in obj):
+            return obj if type(obj) is list else list(obj)
         return [safe_serialize(item) for item in obj]
     elif isinstance(obj, dict):
+        if all(type(k) is str and type(v) in _PRIMITIVE_TYPES for k, v in obj.items()):
+            return obj
         return {str(k): safe_serialize(v) for k, v in obj.items()}
     else:
         return str(obj)